@@ -0,0 +1,178 @@
+"""
+ParkIn - Fleet-Wide Bulk Pricing
+--------------------------------
+Nightly repricing job for the whole parking fleet. Builds the feature rows
+of every (location, day, time slot) for a table of locations in one
+vectorized step, predicts them in large chunks across a pool of worker
+processes and streams the suggested prices to a CSV or Parquet file.
+Event and occupancy sampling is seeded, so a run can be reproduced.
+
+Usage:
+    python bulk_pricing.py --model-path models/price_predictor.pkl \
+        --locations data/locations.csv --days 7 --output reports/prices.csv
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from price_predictor import PricePredictionModel, build_suggestion_features
+
+OUTPUT_COLUMNS = ['location_id', 'date', 'day', 'time_slot', 'special_event', 'expected_occupancy']
+
+# Model of the current worker process, loaded once by the pool initializer
+_worker_model = None
+
+def _init_worker(model_path):
+    """Pool initializer: load the price model once per worker process"""
+    global _worker_model
+    _worker_model = PricePredictionModel(model_path)
+
+def _predict_chunk(features):
+    """Predict the prices of one chunk of feature rows in a worker process"""
+    return _worker_model.predict_price(features)
+
+class _ResultWriter:
+    def __init__(self, output_path):
+        """Append result chunks to a CSV or Parquet file"""
+        self.output_path = output_path
+        self.parquet = output_path.lower().endswith('.parquet')
+        self._writer = None
+        self._header = True
+        
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        if self.parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError("Writing Parquet output requires pyarrow (pip install pyarrow)")
+        elif os.path.exists(output_path):
+            os.remove(output_path)
+    
+    def write(self, frame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.output_path, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(self.output_path, mode='a', header=self._header, index=False)
+            self._header = False
+    
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+def run_bulk_pricing(model_path, locations, output_path, forecast_days=7, start_date=None,
+                     event_probability=0.2, seed=42, chunk_size=50000, num_workers=None):
+    """
+    Price every location of the fleet for the upcoming days
+    
+    Args:
+        model_path: Trained PricePredictionModel file (a shared artifact from
+            save_model(shared=True) is memory-mapped by all workers)
+        locations: DataFrame with one row of features per location
+        output_path: Result file (.csv or .parquet)
+        forecast_days: Number of days to price
+        start_date: First day to price (defaults to today)
+        event_probability: Probability of a special event on a location day
+        seed: Random seed for event and occupancy sampling
+        chunk_size: Feature rows per prediction task
+        num_workers: Worker processes (defaults to the number of CPUs)
+    
+    Returns:
+        Dictionary with the number of locations and rows priced, the run time
+        and throughput
+    """
+    start = time.perf_counter()
+    
+    locations = locations.reset_index(drop=True)
+    if 'location_id' not in locations.columns:
+        locations = locations.assign(location_id=np.arange(len(locations)))
+    
+    features = build_suggestion_features(
+        locations, forecast_days, start_date=start_date,
+        event_probability=event_probability, seed=seed
+    )
+    build_time = time.perf_counter() - start
+    print(f"Built {len(features)} feature rows for {len(locations)} locations in {build_time:.2f}s")
+    
+    chunks = [features.iloc[i:i + chunk_size] for i in range(0, len(features), chunk_size)]
+    writer = _ResultWriter(output_path)
+    rows = 0
+    try:
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                                 initargs=(model_path,)) as executor:
+            # map keeps the chunk order, so the output is ordered like the input
+            for chunk, prices in zip(chunks, executor.map(_predict_chunk, chunks)):
+                results = chunk[OUTPUT_COLUMNS].copy()
+                results['suggested_price'] = np.round(prices, 2)
+                writer.write(results)
+                rows += len(results)
+    finally:
+        writer.close()
+    
+    elapsed = time.perf_counter() - start
+    summary = {
+        'locations': len(locations),
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed else 0.0,
+        'output_path': output_path
+    }
+    print(f"Priced {rows} location slots in {elapsed:.2f}s "
+          f"({summary['rows_per_second']:.0f} rows/s), results in {output_path}")
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reprice the whole ParkIn fleet")
+    parser.add_argument("--model-path", default="models/price_predictor.pkl")
+    parser.add_argument("--locations", default=None,
+                        help="CSV or Parquet table with one row of features per location "
+                             "(a synthetic fleet is generated if omitted)")
+    parser.add_argument("--output", default="reports/bulk_prices.csv")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--start-date", default=None, help="First day to price (YYYY-MM-DD)")
+    parser.add_argument("--event-probability", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+    
+    if args.locations is None:
+        from price_predictor import generate_sample_pricing_data
+        
+        fleet = generate_sample_pricing_data(10000)
+        locations = fleet.drop(columns=['price']).assign(location_id=np.arange(len(fleet)))
+        if not os.path.exists(args.model_path):
+            model = PricePredictionModel()
+            model.train(fleet.drop(columns=['price']), fleet['price'])
+            model.save_model(args.model_path, shared=True)
+    elif args.locations.lower().endswith('.parquet'):
+        locations = pd.read_parquet(args.locations)
+    else:
+        locations = pd.read_csv(args.locations)
+    
+    run_bulk_pricing(
+        args.model_path,
+        locations,
+        args.output,
+        forecast_days=args.days,
+        start_date=datetime.strptime(args.start_date, "%Y-%m-%d") if args.start_date else None,
+        event_probability=args.event_probability,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        num_workers=args.workers
+    )
+
+if __name__ == "__main__":
+    main()
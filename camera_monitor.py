@@ -0,0 +1,215 @@
+"""
+ParkIn - Multi-Camera Parking Monitor
+-------------------------------------
+This module reads several camera feeds at the same time and classifies the
+parking spots of all cameras with one shared ParkingSpotDetector. ROIs from
+every camera are pooled into shared inference batches, so a single CPU node
+can monitor a whole garage with one copy of the model in memory.
+"""
+
+import cv2
+import numpy as np
+import threading
+import time
+
+from parking_spot import ParkingSpotDetector, frame_timestamp, is_live_source
+
+class MultiCameraMonitor:
+    def __init__(self, cameras, detector=None, frame_interval=30, max_wait=0.05):
+        """
+        Initialize the monitor
+        
+        Args:
+            cameras: Mapping of camera id -> (source, parking_coordinates), where
+                source is anything cv2.VideoCapture accepts (file, index, URL)
+            detector: Shared ParkingSpotDetector (a default one is created if None)
+            frame_interval: Classify every Nth frame of each feed
+            max_wait: Seconds to wait for more cameras to deliver a frame before
+                running a batch with the frames collected so far
+        """
+        self.cameras = dict(cameras)
+        self.detector = detector if detector is not None else ParkingSpotDetector()
+        self.frame_interval = max(1, int(frame_interval))
+        self.max_wait = max_wait
+        
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._finished = set()
+        self._stop_event = threading.Event()
+        self._readers = []
+        
+        # Latest result of every spot, keyed by (camera_id, spot_id)
+        self.latest_results = {}
+        
+        self.stats = {
+            "batches": 0,
+            "frames_processed": 0,
+            "frames_dropped": 0,
+            "rois_inferred": 0
+        }
+    
+    def _read_camera(self, camera_id, source):
+        """Reader thread: keep the latest sampled frame of one camera"""
+        cap = cv2.VideoCapture(source)
+        live = is_live_source(source)
+        frame_count = 0
+        
+        try:
+            while cap.isOpened() and not self._stop_event.is_set():
+                if not cap.grab():
+                    break
+                
+                if frame_count % self.frame_interval == 0:
+                    timestamp = frame_timestamp(cap, live)
+                    ret, frame = cap.retrieve()
+                    if not ret:
+                        break
+                    
+                    with self._condition:
+                        # Replace a frame the inference loop has not picked up yet
+                        if camera_id in self._pending:
+                            self.stats["frames_dropped"] += 1
+                        self._pending[camera_id] = (frame_count, timestamp, frame)
+                        self._condition.notify_all()
+                frame_count += 1
+        finally:
+            cap.release()
+            with self._condition:
+                self._finished.add(camera_id)
+                self._condition.notify_all()
+    
+    def _collect_frames(self):
+        """
+        Wait for sampled frames from the cameras
+        
+        Returns once every active camera delivered a frame or max_wait elapsed
+        after the first one arrived. Returns None when all feeds have ended.
+        """
+        with self._condition:
+            while not self._pending:
+                if len(self._finished) == len(self.cameras) or self._stop_event.is_set():
+                    return None
+                self._condition.wait(0.1)
+            
+            deadline = time.monotonic() + self.max_wait
+            while not self._stop_event.is_set():
+                active = len(self.cameras) - len(self._finished - set(self._pending))
+                remaining = deadline - time.monotonic()
+                if len(self._pending) >= active or remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            
+            frames = self._pending
+            self._pending = {}
+            return frames
+    
+    def start(self):
+        """Start one reader thread per camera"""
+        self._stop_event.clear()
+        self._finished = set()
+        self._pending = {}
+        self._readers = []
+        
+        for camera_id, (source, _) in self.cameras.items():
+            reader = threading.Thread(
+                target=self._read_camera,
+                args=(camera_id, source),
+                name=f"camera-{camera_id}",
+                daemon=True
+            )
+            reader.start()
+            self._readers.append(reader)
+    
+    def stop(self):
+        """Stop all reader threads"""
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        for reader in self._readers:
+            reader.join()
+        self._readers = []
+    
+    def run(self, callback=None, max_batches=None):
+        """
+        Stream parking spot results from all cameras
+        
+        Frames collected from the cameras are classified together: their ROIs
+        are concatenated into one batch for a single (chunked) forward pass on
+        the shared detector and the predictions are split back per camera.
+        
+        Args:
+            callback: Optional function called with every result dictionary
+            max_batches: Stop after this many inference batches (None = until all feeds end)
+        
+        Yields:
+            Dictionaries with camera_id, frame_index, timestamp (capture time
+            of the frame, see parking_spot.frame_timestamp) and the list of
+            per-spot results for that camera
+        """
+        self.start()
+        try:
+            while max_batches is None or self.stats["batches"] < max_batches:
+                frames = self._collect_frames()
+                if frames is None:
+                    break
+                
+                # Pool the ROIs of every camera into one batch
+                jobs = []
+                for camera_id, (frame_index, timestamp, frame) in frames.items():
+                    parking_coordinates = self.cameras[camera_id][1]
+                    job = self.detector.prepare_spots(frame, parking_coordinates, camera_id)
+                    jobs.append((camera_id, frame_index, timestamp, job))
+                
+                rois = [roi for _, _, _, job in jobs for roi in job["rois"]]
+                if rois:
+                    preds = self.detector._predict_batch(self.detector.preprocess_batch(rois))
+                else:
+                    preds = np.zeros(0, dtype=np.float32)
+                
+                self.stats["batches"] += 1
+                self.stats["rois_inferred"] += len(preds)
+                
+                # Split the predictions back per camera
+                offset = 0
+                for camera_id, frame_index, timestamp, job in jobs:
+                    count = len(job["rois"])
+                    results = self.detector.finish_spots(job, preds[offset:offset + count])
+                    offset += count
+                    self.stats["frames_processed"] += 1
+                    
+                    for spot in results:
+                        self.latest_results[(camera_id, spot["spot_id"])] = spot
+                    
+                    record = {
+                        "camera_id": camera_id,
+                        "frame_index": frame_index,
+                        "timestamp": timestamp,
+                        "spots": results
+                    }
+                    if callback:
+                        callback(record)
+                    yield record
+        finally:
+            self.stop()
+
+# Example usage
+if __name__ == "__main__":
+    import sys
+    
+    # Example: the same spot layout on two camera feeds given on the command line
+    example_spots = [
+        (100, 200, 80, 120),
+        (190, 200, 80, 120),
+        (280, 200, 80, 120),
+        (370, 200, 80, 120)
+    ]
+    sources = sys.argv[1:] or ["data/camera_1.mp4", "data/camera_2.mp4"]
+    cameras = {f"cam_{i+1}": (source, example_spots) for i, source in enumerate(sources)}
+    
+    monitor = MultiCameraMonitor(cameras, frame_interval=30)
+    for record in monitor.run():
+        occupied = sum(spot["status"] == "occupied" for spot in record["spots"])
+        print(f"{record['camera_id']} frame {record['frame_index']}: "
+              f"{occupied}/{len(record['spots'])} spots occupied")
+    
+    print(f"\nMonitor statistics: {monitor.stats}")
@@ -8,17 +8,15 @@ and improves the recommendation system.
 
 import numpy as np
 import pandas as pd
-from statsmodels.tsa.arima.model import ARIMA
-from prophet import Prophet
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
-import matplotlib.pyplot as plt
-import seaborn as sns
+from forest_inference import CompiledForest, check_parity
+from shared_models import compile_for_serving, load_artifact, save_artifact
 from datetime import datetime, timedelta
 import os
 
 class ParkingDemandForecaster:
-    def __init__(self, model_type='prophet'):
+    def __init__(self, model_type='prophet', compiled=False, model_path=None):
         """
         Initialize the demand forecasting model
         
@@ -27,12 +25,20 @@ class ParkingDemandForecaster:
                 'prophet' - Facebook Prophet forecasting model
                 'arima' - ARIMA time series model
                 'rf' - Random Forest machine learning model
+            compiled: For 'rf', forecast with a CompiledForest exported from
+                the trained forest instead of sklearn's predict
+            model_path: Optional model file saved with save_model to load
         """
         self.model_type = model_type
         self.model = None
+        self.compiled = compiled
+        self.compiled_model = None
         self.scaler = StandardScaler()
         
-        print(f"Initializing {model_type} demand forecasting model")
+        if model_path and os.path.exists(model_path):
+            self.load_model(model_path)
+        else:
+            print(f"Initializing {model_type} demand forecasting model")
     
     def preprocess_data(self, data):
         """Preprocess time series data for forecasting"""
@@ -72,7 +78,9 @@ class ParkingDemandForecaster:
         processed_data = self.preprocess_data(data)
         
         if self.model_type == 'prophet':
-            # Train Facebook Prophet model
+            # Train Facebook Prophet model (imported here so other model types don't load it)
+            from prophet import Prophet
+            
             self.model = Prophet(
                 changepoint_prior_scale=0.05,
                 seasonality_prior_scale=10.0,
@@ -97,6 +105,8 @@ class ParkingDemandForecaster:
         elif self.model_type == 'arima':
             # Train ARIMA model
             # Assuming data is sorted by date and has regular intervals
+            from statsmodels.tsa.arima.model import ARIMA
+            
             self.model = ARIMA(
                 processed_data['demand'].values, 
                 order=(5, 1, 0)  # (p, d, q) order, can be optimized
@@ -116,10 +126,48 @@ class ParkingDemandForecaster:
             )
             self.model.fit(features, target)
             print("Random Forest model trained successfully")
+            
+            if self.compiled:
+                self.compiled_model = CompiledForest.from_sklearn(self.model)
+                check_parity(self.model, self.compiled_model, features)
+                print(f"Compiled {self.compiled_model.n_estimators} trees for fast inference")
         
         else:
             raise ValueError(f"Unsupported model type: {self.model_type}")
     
+    def save_model(self, path="models/demand_forecaster.pkl", shared=False):
+        """
+        Save the trained model
+        
+        Args:
+            path: Model file
+            shared: For 'rf', save a serving-only artifact with the compiled
+                forest, which worker processes memory-map instead of copying
+        """
+        if self.model is None and self.compiled_model is None:
+            raise ValueError("Model not trained. Call train() first.")
+        
+        artifact = {'model_type': self.model_type, 'model': self.model, 'compiled_model': None}
+        if shared and self.model_type == 'rf':
+            artifact['model'] = None
+            artifact['compiled_model'] = compile_for_serving(
+                self.compiled_model if self.compiled_model is not None else self.model
+            )
+        
+        save_artifact(artifact, path)
+        print(f"Demand forecasting model saved to {path}")
+    
+    def load_model(self, path):
+        """Load a model saved with save_model (arrays are memory-mapped)"""
+        artifact = load_artifact(path)
+        self.model_type = artifact['model_type']
+        self.model = artifact['model']
+        self.compiled_model = artifact['compiled_model']
+        
+        if self.compiled and self.compiled_model is None and self.model_type == 'rf':
+            self.compiled_model = CompiledForest.from_sklearn(self.model)
+        print(f"Loaded {self.model_type} demand forecasting model from {path}")
+    
     def forecast(self, periods=24, future_df=None):
         """
         Generate demand forecast
@@ -131,7 +179,7 @@ class ParkingDemandForecaster:
         Returns:
             DataFrame with forecasted demand
         """
-        if self.model is None:
+        if self.model is None and self.compiled_model is None:
             raise ValueError("Model not trained. Call train() first.")
         
         if self.model_type == 'prophet':
@@ -160,7 +208,10 @@ class ParkingDemandForecaster:
             processed_future = self.preprocess_data(future_df)
             features = processed_future.drop(['date'], axis=1, errors='ignore')
             
-            forecast = self.model.predict(features)
+            if self.compiled_model is not None:
+                forecast = self.compiled_model.predict(features.to_numpy(dtype=np.float64))
+            else:
+                forecast = self.model.predict(features)
             future_df['forecast'] = forecast
             return future_df
     
@@ -173,6 +224,8 @@ class ParkingDemandForecaster:
             historical_data: Optional DataFrame with historical data to include in plot
             save_path: Path to save the plot image
         """
+        import matplotlib.pyplot as plt
+        
         plt.figure(figsize=(12, 6))
         
         # Plot formatting
@@ -302,6 +355,9 @@ class ParkingDemandForecaster:
         pivot_data = pivot_data.reindex(day_order)
         
         # Create heatmap
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        
         plt.figure(figsize=(15, 7))
         sns.heatmap(
             pivot_data, 
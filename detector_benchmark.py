@@ -0,0 +1,384 @@
+"""
+ParkIn - Parking Spot Detector Benchmark
+----------------------------------------
+Reproducible throughput benchmark for ParkingSpotDetector. Generates
+synthetic parking lots and videos with a configurable number of spots,
+resolution and occupancy churn, then measures start-up time, per-ROI
+latency, frames per second and peak memory for detect_parking_spots and
+process_video_feed across batch sizes and backends. Every configuration
+runs in a fresh process so start-up time and peak RSS are not polluted by
+earlier runs. Results are written as JSON so regressions can be caught
+before a new detector is rolled out to the edge fleet.
+
+Usage:
+    python detector_benchmark.py --spots 50 200 --batch-sizes 1 16 64 \
+        --backends keras tflite --output reports/detector_benchmark.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+def _peak_rss_mb():
+    """Peak resident set size of the current process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    if sys.platform == 'darwin':
+        return peak / 1e6
+    return peak / 1e3
+
+def generate_parking_layout(num_spots, resolution=(1280, 720), spot_size=(80, 120), margin=10):
+    """
+    Lay out parking spots in rows across the frame
+    
+    Args:
+        num_spots: Number of parking spots
+        resolution: Frame (width, height)
+        spot_size: Spot (width, height) in pixels
+        margin: Gap between spots in pixels
+    
+    Returns:
+        List of (x, y, width, height) tuples
+    """
+    width, height = resolution
+    spot_w, spot_h = spot_size
+    per_row = max(1, (width - margin) // (spot_w + margin))
+    rows = (num_spots + per_row - 1) // per_row
+    
+    # Shrink the spots if the rows do not fit vertically
+    if rows * (spot_h + margin) + margin > height:
+        spot_h = max(8, (height - margin) // rows - margin)
+    
+    spots = []
+    for i in range(num_spots):
+        row, col = divmod(i, per_row)
+        spots.append((margin + col * (spot_w + margin), margin + row * (spot_h + margin), spot_w, spot_h))
+    return spots
+
+def render_parking_lot(spots, occupied, resolution=(1280, 720), rng=None):
+    """
+    Draw a synthetic parking lot frame
+    
+    Args:
+        spots: List of (x, y, width, height) tuples
+        occupied: Boolean occupancy per spot
+        resolution: Frame (width, height)
+        rng: numpy Generator used for car colors and sensor noise
+    
+    Returns:
+        BGR image
+    """
+    if rng is None:
+        rng = np.random.default_rng(0)
+    
+    width, height = resolution
+    img = np.full((height, width, 3), 60, dtype=np.uint8)
+    
+    for i, (x, y, w, h) in enumerate(spots):
+        if occupied[i]:
+            # Occupied - draw a car-like shape
+            color = tuple(int(c) for c in rng.integers(0, 256, 3))
+            cv2.rectangle(img, (x+10, y+10), (x+w-10, y+h-10), color, -1)
+        cv2.rectangle(img, (x, y), (x+w, y+h), (255, 255, 255), 2)
+        cv2.putText(img, f"P{i+1}", (x+5, y+20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    
+    # Mild sensor noise so consecutive frames are never bit-identical
+    noise = rng.integers(0, 8, img.shape, dtype=np.uint8)
+    return cv2.add(img, noise)
+
+def generate_synthetic_video(path, spots, num_frames=300, resolution=(1280, 720), fps=30,
+                             occupancy=0.5, churn=0.01, seed=42):
+    """
+    Write a synthetic parking lot video
+    
+    Args:
+        path: Output video path (.avi, MJPG)
+        spots: List of (x, y, width, height) tuples
+        num_frames: Number of frames
+        resolution: Frame (width, height)
+        fps: Frames per second
+        occupancy: Initial fraction of occupied spots
+        churn: Probability per frame that a spot changes state
+    
+    Returns:
+        Number of spot state changes in the video
+    """
+    rng = np.random.default_rng(seed)
+    occupied = rng.random(len(spots)) < occupancy
+    changes = 0
+    
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, resolution)
+    for _ in range(num_frames):
+        flips = rng.random(len(spots)) < churn
+        occupied ^= flips
+        changes += int(flips.sum())
+        out.write(render_parking_lot(spots, occupied, resolution, rng))
+    out.release()
+    
+    return changes
+
+def _run_config(config, result_queue):
+    """Benchmark one configuration (runs in a fresh process)"""
+    try:
+        rss_before_import = _peak_rss_mb()
+        start = time.perf_counter()
+        from parking_spot import ParkingSpotDetector
+        
+        detector = ParkingSpotDetector(
+            model_path=config["model_path"],
+            batch_size=config["batch_size"],
+            base_weights=config["base_weights"],
+            backend=config["backend"],
+            quantization=config["quantization"],
+            warmup=True
+        )
+        startup_s = time.perf_counter() - start
+        
+        spots = config["spots"]
+        rng = np.random.default_rng(config["seed"])
+        frames = [
+            render_parking_lot(spots, rng.random(len(spots)) < 0.5, config["resolution"], rng)
+            for _ in range(config["frames"])
+        ]
+        
+        # detect_parking_spots on still frames
+        latencies = []
+        for frame in frames:
+            detector.detect_parking_spots(frame, spots)
+            latencies.append(detector.last_timing["total_ms"])
+        latencies = np.array(latencies)
+        
+        # process_video_feed on the synthetic video
+        processed = []
+        video_start = time.perf_counter()
+        detector.process_video_feed(
+            config["video_path"], spots, show_preview=False,
+            frame_interval=config["frame_interval"], pipelined=config["pipelined"],
+            callback=lambda record: processed.append(record["frame_index"]),
+            history_size=0, annotate=False)
+        video_s = time.perf_counter() - video_start
+        pipeline_stats = detector.last_pipeline_stats if config["pipelined"] else None
+        
+        result_queue.put({
+            "startup_s": startup_s,
+            "startup_stats": detector.startup_stats,
+            "detect": {
+                "frames": len(latencies),
+                "mean_frame_ms": float(latencies.mean()),
+                "p50_frame_ms": float(np.percentile(latencies, 50)),
+                "p95_frame_ms": float(np.percentile(latencies, 95)),
+                "per_roi_ms": float(latencies.mean() / max(1, len(spots))),
+                "fps": float(1000.0 / latencies.mean()) if latencies.mean() > 0 else 0.0
+            },
+            "video": {
+                "frames_processed": len(processed),
+                "frames_dropped": pipeline_stats["frames_dropped"] if pipeline_stats else 0,
+                "elapsed_s": video_s,
+                "source_fps": config["video_frames"] / video_s if video_s > 0 else 0.0,
+                "processed_fps": len(processed) / video_s if video_s > 0 else 0.0,
+                "pipeline_stats": pipeline_stats
+            },
+            "peak_rss_mb": _peak_rss_mb(),
+            "baseline_rss_mb": rss_before_import
+        })
+    except Exception as e:
+        result_queue.put({"error": f"{type(e).__name__}: {e}"})
+
+def _wait_for_result(process, result_queue, timeout):
+    """
+    Wait for a benchmark process to report its result
+    
+    Args:
+        process: The started benchmark process
+        result_queue: Queue the process puts its result dictionary on
+        timeout: Seconds to wait before giving up on the process
+    
+    Returns:
+        The result dictionary reported by the process
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return result_queue.get(timeout=1.0)
+        except queue.Empty:
+            pass
+        
+        if not process.is_alive():
+            # The result may still be in flight right after the process exits
+            try:
+                return result_queue.get(timeout=1.0)
+            except queue.Empty:
+                raise RuntimeError(f"benchmark process exited with code {process.exitcode} "
+                                   f"without reporting a result")
+        
+        if time.monotonic() > deadline:
+            process.terminate()
+            process.join()
+            raise RuntimeError(f"benchmark process timed out after {timeout:.0f} s")
+
+def run_benchmarks(spot_counts=(50,), resolution=(1280, 720), batch_sizes=(1, 16, 64),
+                   backends=('keras',), quantization='float16', frames=20, video_frames=300,
+                   frame_interval=10, churn=0.01, pipelined=False, model_path=None,
+                   base_weights=None, seed=42, output_path="reports/detector_benchmark.json",
+                   timeout=600):
+    """
+    Run the benchmark matrix and write the results to JSON
+    
+    Args:
+        spot_counts: Numbers of parking spots per synthetic lot
+        resolution: Frame (width, height)
+        batch_sizes: Detector batch sizes to compare
+        backends: Detector backends to compare ('keras', 'tflite')
+        quantization: TFLite quantization used for the 'tflite' backend
+        frames: Still frames timed through detect_parking_spots
+        video_frames: Length of the synthetic video
+        frame_interval: Detection interval used for process_video_feed
+        churn: Per-frame probability that a spot changes state in the video
+        pipelined: Use the pipelined process_video_feed mode
+        model_path: Optional trained model; the default architecture otherwise
+        base_weights: MobileNetV2 weights for the default model (None = offline)
+        seed: Random seed for the synthetic lots
+        output_path: Where to write the JSON report
+        timeout: Seconds to wait for each configuration before failing it
+    
+    Returns:
+        The report dictionary
+    """
+    report = {
+        "created": datetime.now().isoformat(timespec='seconds'),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "settings": {
+            "resolution": list(resolution),
+            "frames": frames,
+            "video_frames": video_frames,
+            "frame_interval": frame_interval,
+            "churn": churn,
+            "pipelined": pipelined,
+            "quantization": quantization,
+            "model_path": model_path,
+            "seed": seed
+        },
+        "runs": []
+    }
+    
+    # Fresh interpreter per configuration for clean start-up and RSS numbers
+    ctx = multiprocessing.get_context('spawn')
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_spots in spot_counts:
+            spots = generate_parking_layout(num_spots, resolution)
+            video_path = os.path.join(tmp_dir, f"lot_{num_spots}.avi")
+            changes = generate_synthetic_video(video_path, spots, video_frames, resolution,
+                                               churn=churn, seed=seed)
+            
+            for backend in backends:
+                for batch_size in batch_sizes:
+                    config = {
+                        "num_spots": num_spots,
+                        "spots": spots,
+                        "resolution": tuple(resolution),
+                        "batch_size": batch_size,
+                        "backend": backend,
+                        "quantization": quantization,
+                        "frames": frames,
+                        "video_path": video_path,
+                        "video_frames": video_frames,
+                        "frame_interval": frame_interval,
+                        "pipelined": pipelined,
+                        "model_path": model_path,
+                        "base_weights": base_weights,
+                        "seed": seed
+                    }
+                    
+                    print(f"Benchmarking {num_spots} spots, backend={backend}, batch_size={batch_size}")
+                    result_queue = ctx.Queue()
+                    process = ctx.Process(target=_run_config, args=(config, result_queue))
+                    process.start()
+                    try:
+                        result = _wait_for_result(process, result_queue, timeout)
+                    except RuntimeError as e:
+                        result = {"error": str(e)}
+                    process.join()
+                    
+                    run = {
+                        "num_spots": num_spots,
+                        "backend": backend,
+                        "batch_size": batch_size,
+                        "video_state_changes": changes
+                    }
+                    run.update(result)
+                    report["runs"].append(run)
+                    
+                    if "error" in result:
+                        print(f"  failed: {result['error']}")
+                    else:
+                        print(f"  start-up {result['startup_s']:.2f} s, "
+                              f"{result['detect']['per_roi_ms']:.2f} ms/ROI, "
+                              f"{result['detect']['fps']:.1f} FPS, "
+                              f"video {result['video']['frames_processed']} frames classified "
+                              f"({result['video']['frames_dropped']} dropped), "
+                              f"peak RSS {result['peak_rss_mb']:.0f} MB")
+    
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        with open(output_path, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"\nBenchmark report saved to {output_path}")
+    
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ParkIn parking spot detector")
+    parser.add_argument("--spots", type=int, nargs="+", default=[50], help="Spot counts to benchmark")
+    parser.add_argument("--resolution", type=int, nargs=2, default=[1280, 720], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--backends", nargs="+", default=["keras"], choices=["keras", "tflite"])
+    parser.add_argument("--quantization", default="float16", help="TFLite quantization for the tflite backend")
+    parser.add_argument("--frames", type=int, default=20, help="Still frames timed per configuration")
+    parser.add_argument("--video-frames", type=int, default=300)
+    parser.add_argument("--frame-interval", type=int, default=10)
+    parser.add_argument("--churn", type=float, default=0.01)
+    parser.add_argument("--pipelined", action="store_true")
+    parser.add_argument("--model-path", default=None)
+    parser.add_argument("--imagenet", action="store_true",
+                        help="Use ImageNet MobileNetV2 weights for the default model (needs network access)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="reports/detector_benchmark.json")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds allowed per configuration")
+    args = parser.parse_args(argv)
+    
+    run_benchmarks(
+        spot_counts=args.spots,
+        resolution=tuple(args.resolution),
+        batch_sizes=args.batch_sizes,
+        backends=args.backends,
+        quantization=None if args.quantization == "none" else args.quantization,
+        frames=args.frames,
+        video_frames=args.video_frames,
+        frame_interval=args.frame_interval,
+        churn=args.churn,
+        pipelined=args.pipelined,
+        model_path=args.model_path,
+        base_weights='imagenet' if args.imagenet else None,
+        seed=args.seed,
+        output_path=args.output,
+        timeout=args.timeout
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+ParkIn - Import Time Benchmark
+------------------------------
+Measures the cold import time and memory of every ParkIn module. Each
+import runs in a fresh interpreter, so one module's dependencies never
+make another look cheap. The report also lists which heavy libraries
+(TensorFlow, matplotlib, seaborn, Prophet, statsmodels) an import pulls in,
+so a module that starts loading a plotting or forecasting backend eagerly
+again shows up before it slows down CLI and worker start-up.
+
+Usage:
+    python import_benchmark.py --repeats 5 --output reports/import_benchmark.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+import numpy as np
+
+MODULES = [
+    "parking_spot",
+    "camera_monitor",
+    "occupancy_events",
+    "spot_dataset",
+    "recommendation_engine",
+    "recommendation_service",
+    "forest_inference",
+    "shared_models",
+    "price_predictor",
+    "price_cube",
+    "bulk_pricing",
+    "demand_forecaster"
+]
+
+HEAVY_MODULES = ["tensorflow", "matplotlib", "seaborn", "prophet", "statsmodels"]
+
+# Runs in the child interpreter: import one module and report time and memory
+_PROBE = """
+import json, resource, sys, time
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+before = rss_mb()
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+after = rss_mb()
+
+print(json.dumps({{
+    "import_s": elapsed,
+    "rss_before_mb": before,
+    "rss_after_mb": after,
+    "heavy_modules": [name for name in {heavy!r} if name in sys.modules]
+}}))
+"""
+
+def measure_import(module, repeats=3):
+    """
+    Import a module in fresh interpreters and report the median import time
+    
+    Args:
+        module: Module name
+        repeats: Number of fresh interpreters to time
+    
+    Returns:
+        Dictionary with the import time, RSS added by the import and the
+        heavy libraries it loaded (or the error if the import failed)
+    """
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    runs = []
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()
+            return {"module": module, "error": error[-1] if error else "import failed"}
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    
+    rss_added = [run["rss_after_mb"] - run["rss_before_mb"] for run in runs
+                 if run["rss_after_mb"] is not None]
+    return {
+        "module": module,
+        "import_s": float(np.median([run["import_s"] for run in runs])),
+        "import_s_min": float(min(run["import_s"] for run in runs)),
+        "rss_added_mb": float(np.median(rss_added)) if rss_added else None,
+        "rss_after_mb": runs[-1]["rss_after_mb"],
+        "heavy_modules": runs[-1]["heavy_modules"]
+    }
+
+def run_import_benchmark(modules=MODULES, repeats=3, output_path=None):
+    """
+    Measure the cold import of every module
+    
+    Args:
+        modules: Module names to import
+        repeats: Fresh interpreters per module
+        output_path: Where to write the JSON report
+    
+    Returns:
+        The report dictionary
+    """
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeats": repeats,
+        "modules": []
+    }
+    
+    print(f"{'module':<24} {'import s':>9} {'RSS +MB':>8}  heavy libraries")
+    for module in modules:
+        result = measure_import(module, repeats)
+        report["modules"].append(result)
+        
+        if "error" in result:
+            print(f"{module:<24} failed: {result['error']}")
+        else:
+            rss = f"{result['rss_added_mb']:.0f}" if result["rss_added_mb"] is not None else "n/a"
+            heavy = ", ".join(result["heavy_modules"]) or "-"
+            print(f"{module:<24} {result['import_s']:>9.3f} {rss:>8}  {heavy}")
+    
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        with open(output_path, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"\nImport benchmark report saved to {output_path}")
+    
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the import time of the ParkIn modules")
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh interpreters per module")
+    parser.add_argument("--output", default="reports/import_benchmark.json")
+    args = parser.parse_args(argv)
+    
+    run_import_benchmark(args.modules, args.repeats, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+ParkIn - Model Registry
+-----------------------
+In-process registry for the ParkIn predictors (recommender, price model,
+parking spot detector and demand forecaster). Every model artifact is
+loaded once per process, keyed by model name and version, and callers get
+a reference to the active version. A new version is loaded in the
+background and activated with a single atomic swap; predictions already
+running keep using the instance they fetched, so deploying a retrained
+model needs neither a restart nor a second copy of the model per caller.
+Predictors that keep mutable per-call state are shared behind a lock so
+concurrent callers are served one at a time.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from shared_models import get_memory_usage
+
+def _load_recommender(path, **kwargs):
+    from recommendation_engine import ParkingRecommender
+    return ParkingRecommender(path, **kwargs)
+
+def _load_price_model(path, **kwargs):
+    from price_predictor import PricePredictionModel
+    return PricePredictionModel(path, **kwargs)
+
+def _load_detector(path, **kwargs):
+    from parking_spot import ParkingSpotDetector
+    # Warm up before activation so the first request after a swap is not slow
+    kwargs.setdefault('warmup', True)
+    return ParkingSpotDetector(model_path=path, **kwargs)
+
+def _load_forecaster(path, **kwargs):
+    from demand_forecaster import ParkingDemandForecaster
+    return ParkingDemandForecaster(model_path=path, **kwargs)
+
+# Loaders of the built-in predictors, called with the artifact path and loader options
+DEFAULT_LOADERS = {
+    'recommender': _load_recommender,
+    'price': _load_price_model,
+    'detector': _load_detector,
+    'forecaster': _load_forecaster
+}
+
+# Whether one instance of a built-in predictor may be called from several threads at once.
+# Only the price model's predictions are read-only; the recommender updates its score
+# cache, the detector reuses batch, scratch and calibration remap buffers and the
+# forecaster refits its feature scaler on every forecast
+THREAD_SAFE = {
+    'recommender': False,
+    'price': True,
+    'detector': False,
+    'forecaster': False
+}
+
+class SerializedModel:
+    """
+    Proxy that runs every method call of a non-thread-safe predictor under a lock
+    
+    Attributes are passed through, so the proxy is used like the predictor
+    itself. Hold lock to make several calls in a row without interleaving.
+    """
+    
+    def __init__(self, model):
+        self.model = model
+        self.lock = threading.RLock()
+    
+    def __getattr__(self, name):
+        attribute = getattr(self.model, name)
+        if not callable(attribute):
+            return attribute
+        
+        def call(*args, **kwargs):
+            with self.lock:
+                return attribute(*args, **kwargs)
+        return call
+
+class ModelRegistry:
+    def __init__(self, loaders=None, max_workers=1, thread_safe=None):
+        """
+        Initialize the registry
+        
+        Args:
+            loaders: Mapping of model name -> function(path, **options)
+                returning a loaded predictor (defaults to DEFAULT_LOADERS)
+            max_workers: Threads used for background loads
+            thread_safe: Mapping of model name -> whether its predictor can be
+                shared by concurrent callers (defaults to THREAD_SAFE; names
+                not listed are treated as not thread-safe)
+        """
+        self.loaders = dict(DEFAULT_LOADERS if loaders is None else loaders)
+        self.thread_safe = dict(THREAD_SAFE if thread_safe is None else thread_safe)
+        
+        self._lock = threading.Lock()
+        self._models = {}
+        self._active = {}
+        # One lock per (name, version) so concurrent requests load a version only once
+        self._load_locks = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-loader")
+    
+    def register(self, name, loader, thread_safe=False):
+        """
+        Register the loader function of a model name
+        
+        Args:
+            name: Model name
+            loader: Function(path, **options) returning a loaded predictor
+            thread_safe: The predictor can be called from several threads at
+                once; otherwise it is served through a SerializedModel
+        """
+        with self._lock:
+            self.loaders[name] = loader
+            self.thread_safe[name] = thread_safe
+    
+    def load(self, name, version, path, activate=True, **options):
+        """
+        Load a model version (once per process) and optionally activate it
+        
+        Args:
+            name: Model name ('recommender', 'price', 'detector', 'forecaster'
+                or a registered name)
+            version: Version label
+            path: Artifact path passed to the loader
+            activate: Make this version the active one once loaded
+            **options: Extra loader options (e.g. compiled=True for the recommender)
+        
+        Returns:
+            The loaded predictor (wrapped in a SerializedModel if it is not
+            thread-safe)
+        """
+        if name not in self.loaders:
+            raise KeyError(f"No loader registered for model '{name}'")
+        if path and not os.path.exists(path):
+            raise FileNotFoundError(f"Model artifact not found: {path}")
+        
+        key = (name, version)
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(key)
+            
+            if entry is None:
+                before = get_memory_usage()
+                start = time.perf_counter()
+                model = self.loaders[name](path, **options)
+                load_seconds = time.perf_counter() - start
+                after = get_memory_usage()
+                if not self.thread_safe.get(name, False):
+                    model = SerializedModel(model)
+                
+                entry = {
+                    'model': model,
+                    'path': path,
+                    'load_seconds': load_seconds,
+                    'approx_rss_mb': _difference(after, before, 'rss_mb'),
+                    'approx_pss_mb': _difference(after, before, 'pss_mb'),
+                    'loaded_at': datetime.now().isoformat(timespec='seconds')
+                }
+                with self._lock:
+                    self._models[key] = entry
+                print(f"Loaded {name} model version {version} in {load_seconds:.2f}s")
+        
+        if activate:
+            self.activate(name, version)
+        return entry['model']
+    
+    def load_async(self, name, version, path, activate=True, **options):
+        """
+        Load (and by default activate) a model version in the background
+        
+        The active version keeps serving until the new one is fully loaded.
+        
+        Returns:
+            concurrent.futures.Future resolving to the loaded predictor
+        """
+        return self._executor.submit(self.load, name, version, path, activate, **options)
+    
+    def activate(self, name, version):
+        """Atomically make a loaded version the one returned by get(name)"""
+        with self._lock:
+            if (name, version) not in self._models:
+                raise KeyError(f"Model '{name}' version {version} is not loaded")
+            previous = self._active.get(name)
+            self._active[name] = version
+        if previous != version:
+            print(f"Activated {name} model version {version}" +
+                  (f" (was {previous})" if previous is not None else ""))
+    
+    def get(self, name, version=None):
+        """
+        Return a reference to the active (or a specific) version of a model
+        
+        Keep the returned reference for the duration of a request; a swap
+        only affects later calls to get. All callers share the same instance:
+        thread-safe predictors (see THREAD_SAFE, only the price model among
+        the built-in ones) run concurrently, the others are returned as a
+        SerializedModel whose method calls take turns.
+        """
+        with self._lock:
+            if version is None:
+                version = self._active.get(name)
+                if version is None:
+                    raise KeyError(f"No active version of model '{name}'")
+            entry = self._models.get((name, version))
+        if entry is None:
+            raise KeyError(f"Model '{name}' version {version} is not loaded")
+        return entry['model']
+    
+    def active_version(self, name):
+        """Return the active version of a model (None if there is none)"""
+        with self._lock:
+            return self._active.get(name)
+    
+    def unload(self, name, version):
+        """
+        Drop a loaded version that is not active
+        
+        The memory is freed once in-flight requests release their references.
+        """
+        with self._lock:
+            if self._active.get(name) == version:
+                raise ValueError(f"Cannot unload the active version {version} of model '{name}'")
+            # The load lock is kept: a load of this version may be holding it,
+            # and a fresh lock would let a second load run alongside it
+            self._models.pop((name, version), None)
+    
+    def get_info(self):
+        """
+        Return the registry state
+        
+        Returns:
+            Dictionary keyed by model name with the active version and, per
+            loaded version, the artifact path, load time, load timestamp and
+            the approximate memory added by the load (MB, RSS and PSS). The
+            memory figures are process-wide differences around the load, so
+            they include allocations of other threads and miss memory the
+            load took from pages the process already held
+        """
+        with self._lock:
+            info = {}
+            for (name, version), entry in self._models.items():
+                model_info = info.setdefault(name, {
+                    'active_version': self._active.get(name),
+                    'versions': {}
+                })
+                model_info['versions'][version] = {
+                    key: value for key, value in entry.items() if key != 'model'
+                }
+            return info
+    
+    def close(self):
+        """Wait for background loads and stop the loader threads"""
+        self._executor.shutdown(wait=True)
+
+def _difference(after, before, key):
+    """Memory difference between two get_memory_usage reports (None if unavailable)"""
+    if after.get(key) is None or before.get(key) is None:
+        return None
+    return after[key] - before[key]
+
+# Registry shared by everything in this process
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry():
+    """Return the process-wide model registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
+
+# Example usage
+if __name__ == "__main__":
+    from price_predictor import PricePredictionModel, generate_sample_pricing_data
+    
+    # Two versions of the price model, the second trained on more data
+    data = generate_sample_pricing_data(4000)
+    X = data.drop(columns=['price'])
+    for version, rows in ((1, 1000), (2, 4000)):
+        model = PricePredictionModel(engine='hist')
+        model.train(X.iloc[:rows], data['price'].iloc[:rows])
+        model.save_model(f"models/price_predictor_v{version}.pkl", shared=True)
+    
+    registry = get_registry()
+    registry.load('price', 1, "models/price_predictor_v1.pkl")
+    
+    # Serve quotes while version 2 loads and is swapped in
+    stop = threading.Event()
+    served = {1: 0, 2: 0}
+    
+    def serve():
+        while not stop.is_set():
+            version = registry.active_version('price')
+            registry.get('price', version).predict_price(X.iloc[:1])
+            served[version] += 1
+    
+    server = threading.Thread(target=serve)
+    server.start()
+    time.sleep(0.5)
+    registry.load_async('price', 2, "models/price_predictor_v2.pkl").result()
+    time.sleep(0.5)
+    stop.set()
+    server.join()
+    
+    registry.unload('price', 1)
+    print(f"\nQuotes served per version: {served}")
+    print(f"Registry: {registry.get_info()}")
+    registry.close()
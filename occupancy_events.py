@@ -0,0 +1,191 @@
+"""
+ParkIn - Parking Spot Occupancy Events
+--------------------------------------
+This module turns the per-frame output of the parking spot detector into a
+stream of state-change events. Confidences are smoothed over time and a
+hysteresis band with an optional minimum duration keeps single-frame
+flicker from reaching the booking and pricing services, which only need to
+know when a spot becomes empty or occupied.
+"""
+
+import time
+
+class OccupancyTracker:
+    def __init__(self, alpha=0.5, occupied_threshold=0.7, empty_threshold=0.3,
+                 min_duration=0.0, callback=None, emit_initial=False):
+        """
+        Initialize the tracker
+        
+        Args:
+            alpha: Weight of the newest observation in the exponential moving
+                average of each spot's occupied probability (1.0 = no smoothing)
+            occupied_threshold: Smoothed probability above which an empty spot
+                is considered occupied
+            empty_threshold: Smoothed probability below which an occupied spot
+                is considered empty
+            min_duration: Seconds the smoothed probability must stay past a
+                threshold before the state change is emitted
+            callback: Optional function called with every emitted event
+            emit_initial: Emit an event for the first observation of each spot
+        """
+        if not 0.0 <= empty_threshold <= occupied_threshold <= 1.0:
+            raise ValueError("Thresholds must satisfy 0 <= empty_threshold <= occupied_threshold <= 1")
+        
+        self.alpha = alpha
+        self.occupied_threshold = occupied_threshold
+        self.empty_threshold = empty_threshold
+        self.min_duration = min_duration
+        self.callback = callback
+        self.emit_initial = emit_initial
+        
+        # Per-spot state keyed by (camera_id, spot_id)
+        self._spots = {}
+        
+        self.stats = {
+            "observations": 0,
+            "events": 0
+        }
+    
+    @staticmethod
+    def _occupied_probability(spot):
+        """Occupied probability from a result dictionary or an OCCUPANCY_DTYPE record"""
+        if isinstance(spot, dict):
+            occupied = spot["status"] == "occupied"
+        else:
+            occupied = bool(spot["occupied"])
+        confidence = float(spot["confidence"])
+        return confidence if occupied else 1.0 - confidence
+    
+    def _make_event(self, key, occupied, timestamp, probability):
+        camera_id, spot_id = key
+        event = {
+            "event": "spot_became_occupied" if occupied else "spot_became_empty",
+            "camera_id": camera_id,
+            "spot_id": spot_id,
+            "timestamp": timestamp,
+            "confidence": probability if occupied else 1.0 - probability
+        }
+        self.stats["events"] += 1
+        if self.callback:
+            self.callback(event)
+        return event
+    
+    def update(self, results, timestamp=None, camera_id=None):
+        """
+        Feed the results of one frame into the tracker
+        
+        Args:
+            results: List of per-spot result dictionaries (as returned by
+                ParkingSpotDetector.classify_spots) or an OCCUPANCY_DTYPE array
+            timestamp: Frame time in seconds (defaults to now)
+            camera_id: Camera the results belong to
+        
+        Returns:
+            List of events emitted for this frame
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        
+        events = []
+        for spot in results:
+            key = (camera_id, int(spot["spot_id"]))
+            probability = self._occupied_probability(spot)
+            self.stats["observations"] += 1
+            
+            state = self._spots.get(key)
+            if state is None:
+                occupied = probability >= 0.5
+                self._spots[key] = {
+                    "occupied": occupied,
+                    "probability": probability,
+                    "pending_since": None,
+                    "since": timestamp
+                }
+                if self.emit_initial:
+                    events.append(self._make_event(key, occupied, timestamp, probability))
+                continue
+            
+            # Smooth the occupied probability
+            state["probability"] += self.alpha * (probability - state["probability"])
+            
+            # Hysteresis: only a move past the opposite threshold starts a change
+            if state["occupied"]:
+                crossed = state["probability"] < self.empty_threshold
+            else:
+                crossed = state["probability"] > self.occupied_threshold
+            
+            if not crossed:
+                state["pending_since"] = None
+                continue
+            
+            if state["pending_since"] is None:
+                state["pending_since"] = timestamp
+            
+            # Debounce: the change must persist for min_duration
+            if timestamp - state["pending_since"] >= self.min_duration:
+                state["occupied"] = not state["occupied"]
+                state["pending_since"] = None
+                state["since"] = timestamp
+                events.append(self._make_event(key, state["occupied"], timestamp, state["probability"]))
+        
+        return events
+    
+    def track(self, records):
+        """
+        Turn a stream of frame records into a stream of events
+        
+        Args:
+            records: Iterable of records as yielded by
+                ParkingSpotDetector.stream_video_feed or MultiCameraMonitor.run
+        
+        Yields:
+            Occupancy change events
+        """
+        for record in records:
+            spots = record["spots"] if "spots" in record else record["occupancy"]
+            for event in self.update(spots, record.get("timestamp"), record.get("camera_id")):
+                yield event
+    
+    def get_states(self):
+        """Return the current debounced state of every spot keyed by (camera_id, spot_id)"""
+        return {
+            key: {
+                "status": "occupied" if state["occupied"] else "empty",
+                "probability": state["probability"],
+                "since": state["since"]
+            }
+            for key, state in self._spots.items()
+        }
+    
+    def reset(self):
+        """Forget all spot states"""
+        self._spots = {}
+        self.stats = {"observations": 0, "events": 0}
+
+# Example usage
+if __name__ == "__main__":
+    import numpy as np
+    
+    np.random.seed(42)
+    tracker = OccupancyTracker(alpha=0.4, min_duration=2.0)
+    
+    # Simulate 4 spots sampled once per second for 10 minutes with noisy detections
+    true_state = np.array([False, True, False, True])
+    for second in range(600):
+        if second % 150 == 0 and second > 0:
+            true_state[np.random.randint(len(true_state))] ^= True
+        
+        results = []
+        for spot_id, occupied in enumerate(true_state):
+            # 10% of detections flicker to the wrong state
+            detected = occupied if np.random.rand() > 0.1 else not occupied
+            results.append({
+                "spot_id": spot_id,
+                "status": "occupied" if detected else "empty",
+                "confidence": float(np.random.uniform(0.6, 0.99))
+            })
+        
+        for event in tracker.update(results, timestamp=float(second)):
+            print(f"t={event['timestamp']:>5.0f}s spot {event['spot_id']}: {event['event']}")
+    
+    print(f"\n{tracker.stats['observations']} observations -> {tracker.stats['events']} events")
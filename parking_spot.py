@@ -8,32 +8,370 @@ parking availability updates.
 
 import cv2
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-import matplotlib.pyplot as plt
+import threading
+import queue
 import time
 import os
 
+# TensorFlow is imported on first use (see _import_tensorflow) so importing
+# this module does not pay TensorFlow's start-up cost
+tf = None
+
+def _import_tensorflow():
+    """Import TensorFlow on first use and return the module"""
+    global tf
+    if tf is None:
+        import tensorflow
+        tf = tensorflow
+    return tf
+
+# Compact per-spot occupancy record used for streamed and stored results
+OCCUPANCY_DTYPE = np.dtype([
+    ('spot_id', np.int32),
+    ('occupied', np.bool_),
+    ('confidence', np.float32)
+])
+
+def results_to_array(results):
+    """Convert a list of per-spot result dictionaries to an OCCUPANCY_DTYPE array"""
+    occupancy = np.empty(len(results), dtype=OCCUPANCY_DTYPE)
+    for i, spot in enumerate(results):
+        occupancy[i] = (spot["spot_id"], spot["status"] == "occupied", spot["confidence"])
+    return occupancy
+
+def is_live_source(source):
+    """Whether a cv2.VideoCapture source is a live feed (camera index or stream URL) rather than a file"""
+    return not isinstance(source, str) or '://' in source
+
+def frame_timestamp(cap, live):
+    """
+    Capture time of the frame last grabbed from a cv2.VideoCapture
+    
+    Args:
+        cap: The capture the frame was just grabbed from
+        live: Whether the capture is a live feed (see is_live_source)
+    
+    Returns:
+        Wall-clock time (seconds since the epoch) for live feeds, or the
+        frame's position in the video in seconds for recorded files, so
+        replays get the same timestamps however fast they are processed
+    """
+    if live:
+        return time.time()
+    return cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+
+class OccupancyHistory:
+    """Fixed-size ring buffer with the occupancy of the most recent frames"""
+    
+    def __init__(self, max_frames, num_spots):
+        """
+        Args:
+            max_frames: Number of frames to keep
+            num_spots: Number of parking spots per frame
+        """
+        self.max_frames = max(0, int(max_frames))
+        self.num_spots = num_spots
+        self.frame_indices = np.zeros(self.max_frames, dtype=np.int64)
+        self.timestamps = np.zeros(self.max_frames, dtype=np.float64)
+        self.occupancy = np.zeros((self.max_frames, num_spots), dtype=OCCUPANCY_DTYPE)
+        self.occupancy['spot_id'] = -1
+        self._next = 0
+        self._count = 0
+    
+    def append(self, frame_index, timestamp, occupancy):
+        """Store the occupancy of a frame, overwriting the oldest one when full"""
+        if self.max_frames == 0:
+            return
+        
+        slot = self._next
+        self.frame_indices[slot] = frame_index
+        self.timestamps[slot] = timestamp
+        
+        # Out-of-bounds spots are missing from the results; mark them with spot_id -1
+        row = self.occupancy[slot]
+        row['spot_id'] = -1
+        row['occupied'] = False
+        row['confidence'] = 0.0
+        row[occupancy['spot_id']] = occupancy
+        
+        self._next = (slot + 1) % self.max_frames
+        self._count = min(self._count + 1, self.max_frames)
+    
+    def __len__(self):
+        return self._count
+    
+    def to_arrays(self):
+        """
+        Return the stored frames in chronological order
+        
+        Returns:
+            Tuple of (frame_indices, timestamps, occupancy) arrays, where
+            occupancy has shape (frames, num_spots)
+        """
+        if self._count < self.max_frames:
+            order = np.arange(self._count)
+        else:
+            order = (np.arange(self.max_frames) + self._next) % self.max_frames
+        return self.frame_indices[order], self.timestamps[order], self.occupancy[order]
+
+class CameraCalibration:
+    """
+    Precomputed parking spot geometry for one camera
+    
+    Spots can be axis-aligned (x, y, width, height) rectangles or arbitrary
+    quadrilaterals given as four (x, y) corners in the order top-left,
+    top-right, bottom-right, bottom-left (as seen from the spot's front).
+    The perspective warp of every spot into the model input size is computed
+    once and stored as a single stacked remap table, so extracting all spots
+    of a frame is one cv2.remap call. For rectangles the result only
+    approximately matches cv2.resize with linear interpolation: the remap
+    table uses fixed-point bilinear sampling, so on 8-bit images the mean
+    absolute difference stays below about 2 gray levels, while single
+    pixels at spot borders (and on high-frequency texture) can differ much
+    more. Spots that are already the output size match exactly.
+    
+    The extracted ROIs live in a buffer owned by the calibration, so use one
+    calibration object per camera, or extract with copy=True when a
+    calibration is shared between threads.
+    """
+    
+    def __init__(self, spots, output_size=(224, 224)):
+        """
+        Args:
+            spots: List of (x, y, width, height) rectangles and/or quadrilaterals
+            output_size: (width, height) of each extracted spot image
+        """
+        self.output_size = tuple(output_size)
+        self.spots = []
+        
+        out_w, out_h = self.output_size
+        u = (np.arange(out_w, dtype=np.float32) + 0.5) / out_w
+        v = (np.arange(out_h, dtype=np.float32) + 0.5) / out_h
+        grid = np.stack(np.meshgrid(u, v), axis=-1).reshape(-1, 1, 2)
+        unit_square = np.float32([[0, 0], [1, 0], [1, 1], [0, 1]])
+        
+        maps = np.empty((len(spots) * out_h, out_w, 2), dtype=np.float32)
+        for i, spot in enumerate(spots):
+            corners = self._spot_corners(spot)
+            
+            # Map output pixel centres through the unit square onto the spot
+            transform = cv2.getPerspectiveTransform(unit_square, corners)
+            source = cv2.perspectiveTransform(grid, transform).reshape(out_h, out_w, 2)
+            maps[i * out_h:(i + 1) * out_h] = source - 0.5
+            
+            if np.ndim(spot) == 2:
+                self.spots.append(tuple(tuple(float(c) for c in corner) for corner in spot))
+            else:
+                self.spots.append(tuple(int(c) for c in spot))
+        
+        # Fixed-point maps make cv2.remap considerably faster than float maps
+        if len(spots):
+            self.map1, self.map2 = cv2.convertMaps(maps, None, cv2.CV_16SC2)
+        else:
+            self.map1 = self.map2 = None
+        self._buffers = {}
+    
+    @staticmethod
+    def _spot_corners(spot):
+        """Corner points (pixel edges) of a rectangle or quadrilateral spot"""
+        if np.ndim(spot) == 2:
+            corners = np.asarray(spot, dtype=np.float32)
+            if corners.shape != (4, 2):
+                raise ValueError(f"Quadrilateral spots need 4 (x, y) corners, got {spot}")
+            return corners
+        
+        x, y, w, h = spot
+        return np.float32([[x, y], [x + w, y], [x + w, y + h], [x, y + h]])
+    
+    def __len__(self):
+        return len(self.spots)
+    
+    def extract(self, image, copy=False):
+        """
+        Warp every parking spot of a frame to the output size
+        
+        Args:
+            image: Camera frame
+            copy: Warp into a new array instead of the calibration's buffer,
+                which makes concurrent calls from several threads safe
+        
+        Returns:
+            Array of shape (num_spots, height, width[, channels]); unless copy
+            is set it is overwritten by the next call
+        """
+        out_w, out_h = self.output_size
+        shape = (len(self.spots) * out_h, out_w) + image.shape[2:]
+        if self.map1 is None:
+            return np.zeros((0, out_h, out_w) + image.shape[2:], dtype=image.dtype)
+        
+        if copy:
+            buffer = np.empty(shape, dtype=image.dtype)
+        else:
+            key = (image.shape[2:], image.dtype)
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = np.empty(shape, dtype=image.dtype)
+                self._buffers[key] = buffer
+        
+        cv2.remap(image, self.map1, self.map2, cv2.INTER_LINEAR, dst=buffer,
+                  borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+        return buffer.reshape((len(self.spots), out_h, out_w) + image.shape[2:])
+
 class ParkingSpotDetector:
-    def __init__(self, model_path=None):
-        """Initialize the parking spot detector with a pre-trained model"""
+    def __init__(self, model_path=None, batch_size=64, change_threshold=None, max_cache_age=30.0,
+                 base_weights='imagenet', lazy=False, warmup=False, backend='keras',
+                 quantization='float16', representative_data=None, tflite_path=None, num_threads=None):
+        """
+        Initialize the parking spot detector with a pre-trained model
+        
+        Args:
+            model_path: Optional path to a saved Keras model
+            batch_size: Maximum number of parking spot ROIs per forward pass
+            change_threshold: Mean absolute difference (0-255 grayscale) between a
+                spot's thumbnail and its cached thumbnail above which the spot is
+                classified again. None disables change-detection gating.
+            max_cache_age: Seconds after which a cached prediction is refreshed
+                even if the spot looks unchanged
+            base_weights: Weights for the MobileNetV2 base of the default model:
+                'imagenet' (downloaded by Keras), a local weights file, or None
+                for random initialization. Use a local file or None on offline nodes.
+            lazy: Defer importing TensorFlow and loading the model until the
+                model is first used
+            warmup: Run one dummy batch through the model right after loading so
+                the first real frame does not pay for graph tracing
+            backend: Inference backend, 'keras' or 'tflite'. With 'tflite' the Keras
+                model is converted with post-training quantization (or a .tflite
+                model_path is loaded directly) and run by the TFLite interpreter.
+            quantization: TFLite quantization: 'float16', 'int8', 'dynamic' or None
+            representative_data: Sample parking spot crops, required to calibrate
+                'int8' quantization
+            tflite_path: Optional path to save the converted TFLite model to
+            num_threads: Number of CPU threads used by the TFLite interpreter
+        """
+        if backend not in ('keras', 'tflite'):
+            raise ValueError(f"Unsupported backend: {backend}")
+        
+        init_start = time.perf_counter()
         self.IMAGE_SIZE = (224, 224)
         self.CLASSES = ['occupied', 'empty']
+        self.batch_size = max(1, int(batch_size))
+        
+        # Change-detection gating: per-spot (signature, prediction, timestamp) cache
+        self.SIGNATURE_SIZE = (16, 16)
+        self.change_threshold = change_threshold
+        self.max_cache_age = max_cache_age
+        self._spot_cache = {}
+        self.cache_stats = {"hits": 0, "changed": 0, "expired": 0, "new": 0}
+        
+        # Timing breakdown (milliseconds) of the most recent detect_parking_spots call
+        self.last_timing = {}
+        
+        # Throughput statistics of the most recent pipelined process_video_feed call
+        self.last_pipeline_stats = {}
+        
+        # Model loading (immediately, or on first use when lazy)
+        self.model_path = model_path
+        self.base_weights = base_weights
+        self.warmup_on_load = warmup
+        self._model = None
+        self._loaded = False
+        
+        # Inference backend
+        self.backend = backend
+        self.quantization = quantization
+        self.representative_data = representative_data
+        self.tflite_path = tflite_path
+        self.num_threads = num_threads
+        self._interpreter = None
+        
+        # Preallocated preprocessing buffers, reused across frames
+        self._batch_buffer = None
+        self._scratch_buffers = {}
+        
+        # Start-up timings (seconds, first frame in milliseconds)
+        self.startup_stats = {}
+        
+        if not lazy:
+            self._load_model()
+        self.startup_stats["init_s"] = time.perf_counter() - init_start
+    
+    @property
+    def model(self):
+        """The Keras model, loaded on first access when the detector is lazy"""
+        if not self._loaded:
+            self._load_model()
+        if self._model is None:
+            raise ValueError("No Keras model available: the detector was loaded from a .tflite file")
+        return self._model
+    
+    @model.setter
+    def model(self, model):
+        self._model = model
+    
+    def _load_model(self):
+        """Load the model from model_path, or build the default architecture"""
+        load_start = time.perf_counter()
+        _import_tensorflow()
+        self.startup_stats["tensorflow_import_s"] = time.perf_counter() - load_start
         
         # Load model if provided and exists
-        if model_path and os.path.exists(model_path):
-            print(f"Loading parking detection model from {model_path}")
-            self.model = load_model(model_path)
+        if self.model_path and os.path.exists(self.model_path) and self.model_path.endswith('.tflite'):
+            if self.backend != 'tflite':
+                raise ValueError("A .tflite model can only be used with backend='tflite'")
+            print(f"Loading TFLite parking detection model from {self.model_path}")
+            with open(self.model_path, 'rb') as f:
+                self._interpreter = self._create_interpreter(f.read())
+        elif self.model_path and os.path.exists(self.model_path):
+            print(f"Loading parking detection model from {self.model_path}")
+            self._model = tf.keras.models.load_model(self.model_path, compile=False)
         else:
             print("Using default model architecture")
-            self.model = self._build_default_model()
+            self._model = self._build_default_model()
+        
+        if self.backend == 'tflite' and self._interpreter is None:
+            tflite_model = self.convert_to_tflite(self.quantization, self.representative_data, self.tflite_path)
+            self._interpreter = self._create_interpreter(tflite_model)
+        
+        self._loaded = True
+        self.startup_stats["model_load_s"] = time.perf_counter() - load_start
+        
+        if self.warmup_on_load:
+            self.warmup()
+    
+    def warmup(self, batch_size=None):
+        """
+        Run dummy batches through the model
+        
+        The first calls of a Keras model trace its graph. Running a full batch
+        and a single ROI lets TensorFlow relax the traced batch dimension, so
+        later frames with any number of spots run without tracing again.
+        """
+        batch_size = batch_size or self.batch_size
+        
+        # Go through preprocess_image so the dummy input has the real dtype and shape
+        sample = self.preprocess_image(np.zeros((self.IMAGE_SIZE[1], self.IMAGE_SIZE[0], 3), dtype=np.uint8))
+        
+        warmup_start = time.perf_counter()
+        for size in sorted({batch_size, 1}, reverse=True):
+            self._predict_batch(np.repeat(sample, size, axis=0))
+        self.startup_stats["warmup_s"] = time.perf_counter() - warmup_start
+    
+    def _compile_model(self, model=None):
+        """Compile the model for training (loaded and default models are left uncompiled)"""
+        if model is None:
+            model = self.model
+        model.compile(
+            optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
+            loss='binary_crossentropy',
+            metrics=['accuracy']
+        )
     
     def _build_default_model(self):
         """Build a default CNN model architecture for parking spot classification"""
         base_model = tf.keras.applications.MobileNetV2(
             input_shape=(224, 224, 3),
             include_top=False,
-            weights='imagenet'
+            weights=self.base_weights
         )
         
         # Freeze the base model
@@ -47,79 +385,482 @@ class ParkingSpotDetector:
             tf.keras.layers.Dense(1, activation='sigmoid')
         ])
         
-        model.compile(
-            optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
-            loss='binary_crossentropy',
-            metrics=['accuracy']
-        )
-        
         return model
     
     def preprocess_image(self, image):
         """Preprocess an image for model prediction"""
-        # Resize
-        img = cv2.resize(image, self.IMAGE_SIZE)
+        img = np.empty((1, self.IMAGE_SIZE[1], self.IMAGE_SIZE[0], 3), dtype=np.float32)
+        self.preprocess_into(image, img[0])
+        return img
+    
+    def preprocess_into(self, image, out):
+        """
+        Preprocess an image directly into a float32 (height, width, 3) buffer
+        
+        Resizing and channel conversion go through reusable uint8 scratch
+        buffers and normalization writes straight into out, so no per-ROI
+        arrays are allocated.
+        """
+        # Resize (ROIs extracted by a CameraCalibration already have the input size)
+        if len(image.shape) == 2:
+            channels = 1
+        else:
+            channels = image.shape[2]
+        if image.shape[1::-1] == self.IMAGE_SIZE and image.dtype == np.uint8:
+            resized = image
+        else:
+            resized = cv2.resize(image, self.IMAGE_SIZE, dst=self._scratch_buffer(channels))
         
         # Convert to RGB if grayscale
-        if len(img.shape) == 2:
-            img = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
-        elif img.shape[2] == 4:  # RGBA
-            img = cv2.cvtColor(img, cv2.COLOR_RGBA2RGB)
+        if channels == 1:
+            resized = cv2.cvtColor(resized, cv2.COLOR_GRAY2RGB, dst=self._scratch_buffer(3, 'rgb'))
+        elif channels == 4:  # RGBA
+            resized = cv2.cvtColor(resized, cv2.COLOR_RGBA2RGB, dst=self._scratch_buffer(3, 'rgb'))
         
         # Normalize
-        img = img / 255.0
+        np.divide(resized, np.float32(255.0), out=out, dtype=np.float32)
         
-        # Expand dimensions for batch prediction
-        img = np.expand_dims(img, axis=0)
+        return out
+    
+    def _scratch_buffer(self, channels, name='resize'):
+        """Reusable uint8 buffer of the model input size"""
+        key = (name, channels)
+        buffer = self._scratch_buffers.get(key)
+        if buffer is None:
+            shape = (self.IMAGE_SIZE[1], self.IMAGE_SIZE[0])
+            if channels > 1:
+                shape += (channels,)
+            buffer = np.empty(shape, dtype=np.uint8)
+            self._scratch_buffers[key] = buffer
+        return buffer
+    
+    def preprocess_batch(self, rois):
+        """
+        Preprocess ROIs into the detector's preallocated float32 batch buffer
         
-        return img
+        The buffer is reused across frames (it only grows when a frame has
+        more ROIs than ever before), so the returned array is only valid until
+        the next call.
+        """
+        count = len(rois)
+        if self._batch_buffer is None or len(self._batch_buffer) < count:
+            capacity = max(count, self.batch_size)
+            self._batch_buffer = np.empty(
+                (capacity, self.IMAGE_SIZE[1], self.IMAGE_SIZE[0], 3), dtype=np.float32)
+        
+        batch = self._batch_buffer[:count]
+        for i, roi in enumerate(rois):
+            self.preprocess_into(roi, batch[i])
+        return batch
     
-    def detect_parking_spots(self, image, parking_coordinates):
+    def convert_to_tflite(self, quantization='float16', representative_data=None, output_path=None):
         """
-        Detect if parking spots are empty or occupied
+        Convert the Keras model to a TFLite model with post-training quantization
         
         Args:
-            image: Full image containing parking spots
-            parking_coordinates: List of (x, y, width, height) tuples defining parking spots
+            quantization: 'float16' (half-size weights), 'int8' (integer weights
+                and activations, calibrated on representative_data), 'dynamic'
+                (int8 weights, float activations) or None (plain float32)
+            representative_data: Parking spot crops used to calibrate 'int8'
+            output_path: Optional path to save the .tflite model to
+        
+        Returns:
+            The serialized TFLite model
+        """
+        # Use the Keras model directly while _load_model is still running
+        keras_model = self._model if self._model is not None else self.model
+        converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+        
+        if quantization == 'float16':
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            converter.target_spec.supported_types = [tf.float16]
+        elif quantization == 'int8':
+            if representative_data is None or len(representative_data) == 0:
+                raise ValueError("int8 quantization requires representative_data")
+            
+            def representative_dataset():
+                for roi in representative_data:
+                    yield [self.preprocess_image(roi).astype(np.float32)]
             
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            converter.representative_dataset = representative_dataset
+        elif quantization == 'dynamic':
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        elif quantization is not None:
+            raise ValueError(f"Unsupported quantization: {quantization}")
+        
+        tflite_model = converter.convert()
+        print(f"Converted model to TFLite ({quantization or 'float32'}, {len(tflite_model) / 1e6:.1f} MB)")
+        
+        if output_path:
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            with open(output_path, 'wb') as f:
+                f.write(tflite_model)
+            print(f"TFLite model saved to {output_path}")
+        
+        return tflite_model
+    
+    def _create_interpreter(self, tflite_model):
+        """Create a TFLite interpreter, preferring the standalone LiteRT runtime"""
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            Interpreter = tf.lite.Interpreter
+        
+        interpreter = Interpreter(model_content=tflite_model, num_threads=self.num_threads)
+        interpreter.allocate_tensors()
+        return interpreter
+    
+    def _invoke_interpreter(self, interpreter, chunk):
+        """Run one chunk of ROIs through a TFLite interpreter"""
+        input_details = interpreter.get_input_details()[0]
+        
+        # Resize the input tensor only when the chunk size changes
+        if tuple(input_details['shape']) != chunk.shape:
+            interpreter.resize_tensor_input(input_details['index'], chunk.shape)
+            interpreter.allocate_tensors()
+        
+        interpreter.set_tensor(input_details['index'], chunk.astype(np.float32, copy=False))
+        interpreter.invoke()
+        return interpreter.get_tensor(interpreter.get_output_details()[0]['index'])
+    
+    def _predict_batch(self, batch):
+        """
+        Run the model on a stacked batch of preprocessed ROIs
+        
+        The batch is split into chunks of at most self.batch_size so a single
+        forward pass never exceeds the configured memory budget.
+        
         Returns:
-            List of dictionaries with spot index, status, and confidence
+            1-D array with the "occupied" probability for every ROI
         """
-        results = []
-        original_image = image.copy()
+        if not self._loaded:
+            self._load_model()
+        
+        if self.backend == 'tflite':
+            predict_chunk = lambda chunk: self._invoke_interpreter(self._interpreter, chunk)
+        else:
+            predict_chunk = self._model.predict_on_batch
+        
+        return self._run_chunks(batch, predict_chunk)
+    
+    def _run_chunks(self, batch, predict_chunk):
+        """Apply predict_chunk to the batch in chunks of at most self.batch_size"""
+        predictions = []
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start:start + self.batch_size]
+            pred = predict_chunk(chunk)
+            predictions.append(np.asarray(pred).reshape(-1))
+        
+        if not predictions:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(predictions)
+    
+    def compare_backends(self, samples, quantization='float16', representative_data=None, repeats=3):
+        """
+        Compare the Keras model with its quantized TFLite conversion
+        
+        Args:
+            samples: List of parking spot crops to classify with both backends
+            quantization: TFLite quantization to evaluate (see convert_to_tflite)
+            representative_data: Calibration crops for 'int8' (defaults to samples)
+            repeats: Number of timed passes over the samples per backend
+        
+        Returns:
+            Dictionary with accuracy drift (probability differences and status
+            agreement) and throughput (ROIs per second) of both backends
+        """
+        batch = np.stack([self.preprocess_image(roi)[0] for roi in samples])
+        if representative_data is None:
+            representative_data = samples
+        
+        tflite_model = self.convert_to_tflite(quantization, representative_data)
+        interpreter = self._create_interpreter(tflite_model)
+        
+        backends = {
+            'keras': self.model.predict_on_batch,
+            'tflite': lambda chunk: self._invoke_interpreter(interpreter, chunk)
+        }
         
-        for i, (x, y, w, h) in enumerate(parking_coordinates):
-            # Extract parking spot ROI
-            spot_img = image[y:y+h, x:x+w]
+        predictions = {}
+        throughput = {}
+        for name, predict_chunk in backends.items():
+            # Untimed pass to trace graphs / allocate tensors
+            predictions[name] = self._run_chunks(batch, predict_chunk)
             
-            # Skip if ROI is empty (out of bounds)
-            if spot_img.size == 0:
-                continue
+            start = time.perf_counter()
+            for _ in range(repeats):
+                self._run_chunks(batch, predict_chunk)
+            elapsed = time.perf_counter() - start
+            throughput[name] = len(batch) * repeats / elapsed if elapsed > 0 else 0.0
+        
+        drift = np.abs(predictions['keras'] - predictions['tflite'])
+        agreement = np.mean((predictions['keras'] >= 0.5) == (predictions['tflite'] >= 0.5))
+        
+        comparison = {
+            'quantization': quantization or 'float32',
+            'num_samples': len(batch),
+            'model_size_mb': {
+                'keras': sum(w.nbytes for w in self.model.get_weights()) / 1e6,
+                'tflite': len(tflite_model) / 1e6
+            },
+            'mean_abs_drift': float(np.mean(drift)),
+            'max_abs_drift': float(np.max(drift)),
+            'status_agreement': float(agreement),
+            'rois_per_second': throughput,
+            'speedup': throughput['tflite'] / throughput['keras'] if throughput['keras'] else 0.0
+        }
+        
+        print(f"Backend comparison ({comparison['quantization']}): "
+              f"{comparison['speedup']:.2f}x speedup, "
+              f"mean drift {comparison['mean_abs_drift']:.4f}, "
+              f"agreement {comparison['status_agreement']:.1%}")
+        
+        return comparison
+    
+    def _roi_signature(self, roi):
+        """Compute a cheap signature of a ROI: a small grayscale thumbnail"""
+        if len(roi.shape) == 3:
+            if roi.shape[2] == 4:
+                roi = cv2.cvtColor(roi, cv2.COLOR_BGRA2GRAY)
+            else:
+                roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(roi, self.SIGNATURE_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32)
+    
+    def _lookup_spot_cache(self, key, signature, now):
+        """
+        Return the cached prediction for a spot if it is still valid
+        
+        A cached prediction is valid while it is younger than max_cache_age and
+        the spot's signature has not moved past change_threshold.
+        
+        Returns:
+            Cached "occupied" probability, or None if the spot must be classified
+        """
+        entry = self._spot_cache.get(key)
+        if entry is None:
+            self.cache_stats["new"] += 1
+            return None
+        
+        cached_signature, cached_pred, timestamp = entry
+        if self.max_cache_age is not None and now - timestamp > self.max_cache_age:
+            self.cache_stats["expired"] += 1
+            return None
+        
+        if cached_signature.shape != signature.shape or \
+                np.mean(np.abs(signature - cached_signature)) > self.change_threshold:
+            self.cache_stats["changed"] += 1
+            return None
+        
+        self.cache_stats["hits"] += 1
+        return cached_pred
+    
+    def get_cache_stats(self):
+        """Return change-detection cache counters and the overall hit rate"""
+        stats = dict(self.cache_stats)
+        lookups = sum(stats.values())
+        stats["lookups"] = lookups
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["cached_spots"] = len(self._spot_cache)
+        return stats
+    
+    def reset_spot_cache(self):
+        """Forget all cached spot predictions and reset the cache counters"""
+        self._spot_cache = {}
+        self.cache_stats = {"hits": 0, "changed": 0, "expired": 0, "new": 0}
+    
+    def prepare_spots(self, image, parking_coordinates, camera_id=None):
+        """
+        Crop and preprocess the parking spot ROIs of a frame for classification
+        
+        Spots whose cached prediction is still valid (see change_threshold) are
+        resolved immediately; the crops of the others are collected in
+        job["rois"] so they can be preprocessed and classified together,
+        possibly along with spots from other frames.
+        
+        Args:
+            image: Full image containing parking spots
+            parking_coordinates: List of (x, y, width, height) tuples defining parking
+                spots, or a CameraCalibration with precomputed spot geometry
+            camera_id: Optional camera identifier that namespaces the spot cache
+        
+        Returns:
+            Job dictionary to be completed with finish_spots
+        """
+        now = time.monotonic()
+        job = {
+            "camera_id": camera_id,
+            "timestamp": now,
+            "spot_indices": [],
+            "spot_coordinates": [],
+            "spot_preds": [],
+            "infer_positions": [],
+            "infer_signatures": [],
+            "rois": []
+        }
+        
+        # Calibrated cameras extract every spot at model input size with one remap
+        if isinstance(parking_coordinates, CameraCalibration):
+            spot_images = parking_coordinates.extract(image)
+            spots = parking_coordinates.spots
+        else:
+            spot_images = None
+            spots = parking_coordinates
+        
+        for i, coordinates in enumerate(spots):
+            if spot_images is not None:
+                spot_img = spot_images[i]
+            else:
+                # Extract parking spot ROI
+                x, y, w, h = coordinates
+                spot_img = image[y:y+h, x:x+w]
+                
+                # Skip if ROI is empty (out of bounds)
+                if spot_img.size == 0:
+                    continue
                 
-            # Preprocess for prediction
-            processed_img = self.preprocess_image(spot_img)
+                coordinates = (x, y, w, h)
+            
+            job["spot_indices"].append(i)
+            job["spot_coordinates"].append(coordinates)
             
-            # Make prediction
-            pred = self.model.predict(processed_img, verbose=0)[0][0]
+            signature = None
+            if self.change_threshold is not None:
+                signature = self._roi_signature(spot_img)
+                cached_pred = self._lookup_spot_cache((camera_id, coordinates), signature, now)
+                if cached_pred is not None:
+                    job["spot_preds"].append(cached_pred)
+                    continue
             
+            job["infer_positions"].append(len(job["spot_preds"]))
+            job["infer_signatures"].append(signature)
+            job["spot_preds"].append(None)
+            job["rois"].append(spot_img)
+        
+        return job
+    
+    def finish_spots(self, job, preds):
+        """
+        Turn model predictions for a prepared job into per-spot results
+        
+        Args:
+            job: Job dictionary returned by prepare_spots
+            preds: "Occupied" probabilities for the ROIs in job["rois"]
+        
+        Returns:
+            List of dictionaries with spot index, status, and confidence
+        """
+        spot_preds = job["spot_preds"]
+        for pos, signature, pred in zip(job["infer_positions"], job["infer_signatures"], preds):
+            spot_preds[pos] = float(pred)
+            if signature is not None:
+                key = (job["camera_id"], job["spot_coordinates"][pos])
+                self._spot_cache[key] = (signature, float(pred), job["timestamp"])
+        
+        results = []
+        for i, coordinates, pred in zip(job["spot_indices"], job["spot_coordinates"], spot_preds):
             # Determine status
             status = "empty" if pred < 0.5 else "occupied"
             confidence = 1 - pred if status == "empty" else pred
             
-            # Draw bounding box on original image
-            color = (0, 255, 0) if status == "empty" else (0, 0, 255)  # Green for empty, Red for occupied
-            cv2.rectangle(original_image, (x, y), (x+w, y+h), color, 2)
-            cv2.putText(original_image, f"{status} ({confidence:.2f})", 
-                       (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-            
             results.append({
                 "spot_id": i,
                 "status": status,
                 "confidence": float(confidence),
-                "coordinates": (x, y, w, h)
+                "coordinates": coordinates
             })
         
-        return results, original_image
+        return results
+    
+    def classify_spots(self, image, parking_coordinates, camera_id=None):
+        """
+        Classify parking spots as empty or occupied without drawing anything
+        
+        All parking spot ROIs are cropped and preprocessed into one stacked
+        tensor, then classified with a single (chunked) forward pass instead of
+        one model call per spot. When change_threshold is set, spots whose
+        thumbnail has not changed since their last classification reuse the
+        cached prediction and skip the model entirely. A timing breakdown for
+        the frame is stored in self.last_timing.
+        
+        Args:
+            image: Full image containing parking spots
+            parking_coordinates: List of (x, y, width, height) tuples defining parking spots
+            camera_id: Optional camera identifier that namespaces the spot cache
+        
+        Returns:
+            List of dictionaries with spot index, status, and confidence
+        """
+        frame_start = time.perf_counter()
+        job = self.prepare_spots(image, parking_coordinates, camera_id)
+        batch = self.preprocess_batch(job["rois"])
+        preprocess_done = time.perf_counter()
+        
+        # Make predictions for all changed spots at once
+        preds = self._predict_batch(batch) if len(batch) else []
+        inference_done = time.perf_counter()
+        
+        results = self.finish_spots(job, preds)
+        
+        self.last_timing = {
+            "num_spots": len(job["spot_indices"]),
+            "num_inferred": len(batch),
+            "preprocess_ms": (preprocess_done - frame_start) * 1000,
+            "inference_ms": (inference_done - preprocess_done) * 1000,
+            "total_ms": (time.perf_counter() - frame_start) * 1000
+        }
+        if "first_frame_ms" not in self.startup_stats:
+            self.startup_stats["first_frame_ms"] = self.last_timing["total_ms"]
+        
+        return results
+    
+    def annotate_frame(self, image, results):
+        """Draw the detection results onto a copy of the image"""
+        annotated_image = image.copy()
+        
+        for spot in results:
+            coordinates = spot["coordinates"]
+            status = spot["status"]
+            
+            # Draw bounding box (or polygon for calibrated spots) on original image
+            color = (0, 255, 0) if status == "empty" else (0, 0, 255)  # Green for empty, Red for occupied
+            if np.ndim(coordinates) == 2:
+                corners = np.round(np.asarray(coordinates)).astype(np.int32)
+                cv2.polylines(annotated_image, [corners], True, color, 2)
+                x, y = corners.min(axis=0)
+            else:
+                x, y, w, h = coordinates
+                cv2.rectangle(annotated_image, (x, y), (x+w, y+h), color, 2)
+            cv2.putText(annotated_image, f"{status} ({spot['confidence']:.2f})", 
+                       (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        
+        return annotated_image
+    
+    def detect_parking_spots(self, image, parking_coordinates, annotate=True):
+        """
+        Detect if parking spots are empty or occupied
+        
+        Args:
+            image: Full image containing parking spots
+            parking_coordinates: List of (x, y, width, height) tuples defining parking spots
+            annotate: Whether to draw the results on a copy of the image
+        
+        Returns:
+            List of dictionaries with spot index, status, and confidence,
+            and a copy of the image annotated with the results (None if
+            annotate is False)
+        """
+        frame_start = time.perf_counter()
+        results = self.classify_spots(image, parking_coordinates)
+        
+        annotate_start = time.perf_counter()
+        annotated_image = self.annotate_frame(image, results) if annotate else None
+        frame_done = time.perf_counter()
+        
+        self.last_timing["annotate_ms"] = (frame_done - annotate_start) * 1000
+        self.last_timing["total_ms"] = (frame_done - frame_start) * 1000
+        
+        return results, annotated_image
     
     def train(self, train_data, validation_data, epochs=10):
         """
@@ -130,28 +871,191 @@ class ParkingSpotDetector:
             validation_data: Validation data generator
             epochs: Number of training epochs
         """
+        if getattr(self.model, 'optimizer', None) is None:
+            self._compile_model()
+        
         # Train the model
+        monitor = 'val_loss' if validation_data is not None else 'loss'
         history = self.model.fit(
             train_data,
             validation_data=validation_data,
             epochs=epochs,
             callbacks=[
-                tf.keras.callbacks.EarlyStopping(patience=3, restore_best_weights=True),
-                tf.keras.callbacks.ReduceLROnPlateau(factor=0.2, patience=2)
+                tf.keras.callbacks.EarlyStopping(monitor=monitor, patience=3, restore_best_weights=True),
+                tf.keras.callbacks.ReduceLROnPlateau(monitor=monitor, factor=0.2, patience=2)
+            ]
+        )
+        
+        return history
+    
+    def train_from_dataset(self, train_dir, validation_dir=None, epochs=10, batch_size=32,
+                           augment=True, cache_features=False, feature_cache_dir=None):
+        """
+        Train the model on ROI datasets written by spot_dataset.build_spot_dataset
+        
+        The shards are read through a parallel, cached and prefetched tf.data
+        pipeline. With cache_features the frozen base network runs only once
+        per dataset: its outputs are cached and just the dense head is
+        trained on them, which takes seconds instead of rerunning MobileNetV2
+        every epoch. Augmentation does not apply to cached features.
+        
+        Args:
+            train_dir: Directory with the training shards
+            validation_dir: Optional directory with the validation shards
+            epochs: Number of training epochs
+            batch_size: Training batch size
+            augment: Apply random flips and brightness/contrast jitter (image training only)
+            cache_features: Train only the head on cached base-network features
+            feature_cache_dir: Optional directory to keep the feature cache in
+                between runs (delete it when the base network changes)
+        """
+        from spot_dataset import load_spot_dataset, extract_spot_features, load_spot_features
+        
+        if not cache_features:
+            train_data = load_spot_dataset(train_dir, batch_size, shuffle=True, augment=augment)
+            validation_data = None
+            if validation_dir:
+                validation_data = load_spot_dataset(validation_dir, batch_size, shuffle=False)
+            return self.train(train_data, validation_data, epochs)
+        
+        feature_extractor, head = self._split_frozen_base()
+        
+        def load_features(dataset_dir, name):
+            cache_path = None
+            if feature_cache_dir:
+                cache_path = os.path.join(feature_cache_dir, f"{name}_features.npz")
+                if os.path.exists(cache_path):
+                    print(f"Loading cached {name} features from {cache_path}")
+                    return load_spot_features(cache_path)
+            
+            dataset = load_spot_dataset(dataset_dir, batch_size, shuffle=False, cache=False)
+            return extract_spot_features(feature_extractor, dataset, cache_path)
+        
+        def feature_dataset(features, labels, shuffle):
+            dataset = tf.data.Dataset.from_tensor_slices((features, labels))
+            if shuffle:
+                dataset = dataset.shuffle(len(features), seed=42, reshuffle_each_iteration=True)
+            return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+        
+        train_data = feature_dataset(*load_features(train_dir, "train"), shuffle=True)
+        validation_data = None
+        if validation_dir:
+            validation_data = feature_dataset(*load_features(validation_dir, "validation"), shuffle=False)
+        
+        # The head shares its layers with self.model, so training it updates the detector
+        self._compile_model(head)
+        monitor = 'val_loss' if validation_data is not None else 'loss'
+        history = head.fit(
+            train_data,
+            validation_data=validation_data,
+            epochs=epochs,
+            callbacks=[
+                tf.keras.callbacks.EarlyStopping(monitor=monitor, patience=3, restore_best_weights=True),
+                tf.keras.callbacks.ReduceLROnPlateau(monitor=monitor, factor=0.2, patience=2)
             ]
         )
         
         return history
     
+    def _split_frozen_base(self):
+        """
+        Split the model into its frozen feature extractor and trainable head
+        
+        The leading layers without trainable weights (the frozen MobileNetV2
+        base and the pooling layer in the default architecture) form the
+        feature extractor; the remaining layers form the head. Both share
+        their layers with self.model.
+        """
+        layers = self.model.layers
+        split = 0
+        while split < len(layers) and not layers[split].trainable_weights:
+            split += 1
+        
+        if split == 0 or split == len(layers):
+            raise ValueError("The model has no frozen base network to cache features from")
+        
+        feature_extractor = tf.keras.Model(self.model.inputs, layers[split - 1].output)
+        head = tf.keras.Sequential(
+            [tf.keras.Input(shape=feature_extractor.output_shape[1:])] + layers[split:])
+        
+        return feature_extractor, head
+    
     def save_model(self, path="models/parking_detector.h5"):
         """Save the trained model"""
         os.makedirs(os.path.dirname(path), exist_ok=True)
         self.model.save(path)
         print(f"Model saved to {path}")
     
-    def process_video_feed(self, video_path, parking_coordinates, output_path=None, show_preview=True):
-        """Process a video feed for parking spot detection"""
+    def process_video_feed(self, video_path, parking_coordinates, output_path=None, show_preview=True,
+                           frame_interval=30, pipelined=False, queue_size=4, callback=None,
+                           history_size=None, annotate=True, drop_stale=False):
+        """
+        Process a video feed for parking spot detection
+        
+        Args:
+            video_path: Video file path, camera index or stream URL
+            parking_coordinates: List of (x, y, width, height) tuples defining parking spots
+            output_path: Optional path for the annotated output video
+            show_preview: Whether to show the annotated frames in a window
+            frame_interval: Run detection on every Nth frame
+            pipelined: Run decoding, inference and annotation/writing on separate
+                threads joined by bounded queues (see _iter_frames_pipelined)
+            queue_size: Maximum number of frames waiting between pipeline stages
+            callback: Optional function called with the compact record of every
+                processed frame as soon as it is available (see stream_video_feed)
+            history_size: None keeps the full list of per-frame results; an
+                integer keeps only the occupancy of the last N frames in an
+                OccupancyHistory ring buffer (0 keeps nothing)
+            annotate: Whether to draw the results; headless runs without output
+                video or preview can skip drawing entirely
+            drop_stale: In pipelined mode, drop the oldest queued frame when
+                inference falls behind instead of waiting for it. Use this for
+                live cameras and streams to stay close to real time; leave it
+                off for recorded files, where every sampled frame should be
+                classified
+        
+        Returns:
+            List with the detection results of every processed frame, or an
+            OccupancyHistory when history_size is given
+        """
+        if history_size is None:
+            results_history = []
+        else:
+            results_history = OccupancyHistory(history_size, len(parking_coordinates))
+        
+        for record in self.stream_video_feed(
+                video_path, parking_coordinates, output_path, show_preview,
+                frame_interval, pipelined, queue_size, annotate, drop_stale):
+            if callback:
+                callback(record)
+            
+            if history_size is None:
+                results_history.append(record["results"])
+            else:
+                results_history.append(record["frame_index"], record["timestamp"], record["occupancy"])
+        
+        return results_history
+    
+    def stream_video_feed(self, video_path, parking_coordinates, output_path=None, show_preview=False,
+                          frame_interval=30, pipelined=False, queue_size=4, annotate=True,
+                          drop_stale=False):
+        """
+        Process a video feed and yield the results of every processed frame
+        
+        Unlike process_video_feed nothing is accumulated, so this is suitable
+        for feeds that run indefinitely. Arguments are the same as for
+        process_video_feed; drawing only happens when annotate is set and the
+        annotated frame is previewed or written to output_path.
+        
+        Yields:
+            Dictionaries with frame_index, timestamp, the per-spot results and
+            the same results as a compact OCCUPANCY_DTYPE structured array.
+            The timestamp is the capture time of the frame (see
+            frame_timestamp): wall-clock time for live feeds and the position
+            in the video for files
+        """
         cap = cv2.VideoCapture(video_path)
+        live = is_live_source(video_path)
         
         # Get video properties
         fps = int(cap.get(cv2.CAP_PROP_FPS))
@@ -159,45 +1063,222 @@ class ParkingSpotDetector:
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         
         # Initialize video writer if output path is provided
+        out = None
         if output_path:
             fourcc = cv2.VideoWriter_fourcc(*'mp4v')
             out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
         
+        draw = annotate and (show_preview or out is not None)
+        
+        if pipelined:
+            frames = self._iter_frames_pipelined(cap, parking_coordinates, frame_interval, queue_size,
+                                                 drop_stale, live)
+        else:
+            frames = self._iter_frames(cap, parking_coordinates, frame_interval, live)
+        
+        try:
+            for frame_index, timestamp, frame, results in frames:
+                if draw:
+                    annotated_frame = self.annotate_frame(frame, results)
+                    
+                    if show_preview:
+                        cv2.imshow('Parking Detection', annotated_frame)
+                        if cv2.waitKey(1) & 0xFF == ord('q'):
+                            break
+                    
+                    if out is not None:
+                        out.write(annotated_frame)
+                
+                yield {
+                    "frame_index": frame_index,
+                    "timestamp": timestamp,
+                    "results": results,
+                    "occupancy": results_to_array(results)
+                }
+        finally:
+            # Clean up
+            frames.close()
+            cap.release()
+            if out is not None:
+                out.release()
+            if show_preview:
+                cv2.destroyAllWindows()
+    
+    def _iter_frames(self, cap, parking_coordinates, frame_interval, live=False):
+        """Decode every Nth frame and classify its spots on the calling thread"""
         frame_count = 0
-        results_history = []
         
         while cap.isOpened():
-            ret, frame = cap.read()
+            # Only decode the frames we process, skipped frames are just grabbed
+            if frame_count % max(1, frame_interval) != 0:
+                if not cap.grab():
+                    break
+                frame_count += 1
+                continue
+            
+            if not cap.grab():
+                break
+            timestamp = frame_timestamp(cap, live)
+            ret, frame = cap.retrieve()
             if not ret:
                 break
             
-            # Process every 30 frames (adjust for performance)
-            if frame_count % 30 == 0:
-                results, annotated_frame = self.detect_parking_spots(frame, parking_coordinates)
-                results_history.append(results)
+            yield frame_count, timestamp, frame, self.classify_spots(frame, parking_coordinates)
+            frame_count += 1
+    
+    def _iter_frames_pipelined(self, cap, parking_coordinates, frame_interval, queue_size,
+                               drop_stale=False, live=False):
+        """
+        Pipelined version of _iter_frames
+        
+        A decode thread grabs frames and decodes every Nth one, an inference
+        thread classifies the spots and the consumer of this generator
+        annotates, previews and writes the results. The stages are joined by
+        bounded queues, so the stages overlap while memory stays bounded. When
+        inference falls behind, the decoder waits for room in the queue, or
+        with drop_stale drops the oldest queued frame so live feeds are always
+        processed close to real time. Frames carry their capture time (see
+        frame_timestamp) through the queues. Throughput, drop count and queue
+        depth statistics are stored in self.last_pipeline_stats.
+        """
+        frame_queue = queue.Queue(maxsize=max(1, queue_size))
+        result_queue = queue.Queue(maxsize=max(1, queue_size))
+        stop_event = threading.Event()
+        stats = {
+            "frames_read": 0,
+            "frames_dropped": 0,
+            "frames_processed": 0,
+            "frame_queue_depths": [],
+            "result_queue_depths": []
+        }
+        errors = []
+        
+        def put_frame(item):
+            while not stop_event.is_set():
+                if not drop_stale:
+                    # Wait for inference, waking up regularly to notice a stop
+                    try:
+                        frame_queue.put(item, timeout=0.1)
+                        return
+                    except queue.Full:
+                        continue
                 
-                if show_preview:
-                    cv2.imshow('Parking Detection', annotated_frame)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                # Drop the stalest queued frame instead of blocking the decoder
+                try:
+                    frame_queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        frame_queue.get_nowait()
+                        stats["frames_dropped"] += 1
+                    except queue.Empty:
+                        pass
+        
+        def put_sentinel(q):
+            # End-of-stream marker; make room for it if the consumer has stopped
+            while True:
+                try:
+                    q.put_nowait(None)
+                    return
+                except queue.Full:
+                    if stop_event.is_set():
+                        try:
+                            q.get_nowait()
+                        except queue.Empty:
+                            pass
+                    else:
+                        time.sleep(0.01)
+        
+        def decode_stage():
+            frame_count = 0
+            try:
+                while cap.isOpened() and not stop_event.is_set():
+                    if not cap.grab():
                         break
-                
-                if output_path:
-                    out.write(annotated_frame)
-            
-            frame_count += 1
+                    stats["frames_read"] += 1
+                    
+                    if frame_count % max(1, frame_interval) == 0:
+                        timestamp = frame_timestamp(cap, live)
+                        ret, frame = cap.retrieve()
+                        if not ret:
+                            break
+                        stats["frame_queue_depths"].append(frame_queue.qsize())
+                        put_frame((frame_count, timestamp, frame))
+                    frame_count += 1
+            except Exception as e:
+                errors.append(e)
+            finally:
+                put_sentinel(frame_queue)
         
-        # Clean up
-        cap.release()
-        if output_path:
-            out.release()
-        cv2.destroyAllWindows()
+        def inference_stage():
+            try:
+                while True:
+                    item = frame_queue.get()
+                    if item is None or stop_event.is_set():
+                        break
+                    frame_index, timestamp, frame = item
+                    results = self.classify_spots(frame, parking_coordinates)
+                    stats["result_queue_depths"].append(result_queue.qsize())
+                    result_queue.put((frame_index, timestamp, frame, results))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                put_sentinel(result_queue)
         
-        return results_history
+        decoder = threading.Thread(target=decode_stage, name="parking-decode", daemon=True)
+        inferer = threading.Thread(target=inference_stage, name="parking-inference", daemon=True)
+        
+        start_time = time.perf_counter()
+        decoder.start()
+        inferer.start()
+        
+        try:
+            while True:
+                item = result_queue.get()
+                if item is None:
+                    break
+                stats["frames_processed"] += 1
+                yield item
+        finally:
+            # Unblock the other stages if the consumer stopped early
+            stop_event.set()
+            for q in (frame_queue, result_queue):
+                try:
+                    while True:
+                        q.get_nowait()
+                except queue.Empty:
+                    pass
+            decoder.join()
+            inferer.join()
+            elapsed = time.perf_counter() - start_time
+            
+            frame_depths = stats.pop("frame_queue_depths")
+            result_depths = stats.pop("result_queue_depths")
+            stats["elapsed_s"] = elapsed
+            stats["decode_fps"] = stats["frames_read"] / elapsed if elapsed > 0 else 0.0
+            stats["processed_fps"] = stats["frames_processed"] / elapsed if elapsed > 0 else 0.0
+            stats["queue_depths"] = {
+                "frame_queue": {
+                    "mean": float(np.mean(frame_depths)) if frame_depths else 0.0,
+                    "max": int(max(frame_depths)) if frame_depths else 0
+                },
+                "result_queue": {
+                    "mean": float(np.mean(result_depths)) if result_depths else 0.0,
+                    "max": int(max(result_depths)) if result_depths else 0
+                }
+            }
+            self.last_pipeline_stats = stats
+            
+            print(f"Pipeline processed {stats['frames_processed']} frames "
+                  f"({stats['processed_fps']:.1f} FPS, {stats['frames_dropped']} dropped)")
+        
+        if errors:
+            raise errors[0]
 
 # Example usage
 if __name__ == "__main__":
     # Initialize detector
-    detector = ParkingSpotDetector()
+    detector = ParkingSpotDetector(warmup=True)
     
     # Example parking spot coordinates (x, y, width, height)
     # These would typically be defined based on camera calibration
@@ -243,11 +1324,20 @@ if __name__ == "__main__":
     for spot in results:
         print(f"Spot {spot['spot_id']}: {spot['status']} (confidence: {spot['confidence']:.2f})")
     
+    startup = detector.startup_stats
+    print(f"\nStart-up: model ready in {startup['init_s']:.2f} s "
+          f"(warm-up {startup.get('warmup_s', 0):.2f} s), first frame {startup['first_frame_ms']:.1f} ms")
+    
+    timing = detector.last_timing
+    print(f"\nProcessed {timing['num_spots']} spots in {timing['total_ms']:.1f} ms "
+          f"(preprocess {timing['preprocess_ms']:.1f} ms, inference {timing['inference_ms']:.1f} ms)")
+    
     # Save the annotated image
     cv2.imwrite("data/detected_parking_spots.jpg", annotated_image)
     print("\nAnnotated image saved to data/detected_parking_spots.jpg")
     
     # This would actually show the image, but commented out for demo
+    # import matplotlib.pyplot as plt
     # plt.figure(figsize=(10, 8))
     # plt.imshow(cv2.cvtColor(annotated_image, cv2.COLOR_BGR2RGB))
     # plt.title("Parking Spot Detection")
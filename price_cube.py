@@ -0,0 +1,232 @@
+"""
+ParkIn - Materialized Price Cube
+--------------------------------
+This module precomputes the predicted price of every (location,
+day_of_week, hour, special_event) combination with a PricePredictionModel
+into one compact float32 array. Live booking quotes become an array lookup
+by index instead of a call into the gradient boosting pipeline. Locations
+whose features change are refreshed individually, and keys that are not
+materialized fall back to the model.
+"""
+
+import os
+import time
+
+import numpy as np
+
+from price_predictor import DAYS, HOURS
+
+EVENTS = ['No', 'Yes']
+
+def _event_index(special_event):
+    """Index into EVENTS of a True/False or 'Yes'/'No' special event flag"""
+    if isinstance(special_event, str):
+        return int(special_event == 'Yes')
+    return int(bool(special_event))
+
+def _check_hours(hours):
+    """Raise if any hour is outside 0-23 (negative hours would wrap around)"""
+    hours = np.asarray(hours)
+    if hours.size and (hours.min() < 0 or hours.max() >= len(HOURS)):
+        raise ValueError(f"hour must be between 0 and {len(HOURS) - 1}")
+    return hours.astype(np.intp)
+
+class PriceCube:
+    def __init__(self, model=None):
+        """
+        Initialize an empty cube
+        
+        Args:
+            model: PricePredictionModel used to materialize prices and to
+                quote keys that are not in the cube
+        """
+        self.model = model
+        self.prices = np.zeros((0, len(DAYS), len(HOURS), len(EVENTS)), dtype=np.float32)
+        self.location_ids = []
+        self._location_index = {}
+        self._day_index = {day: i for i, day in enumerate(DAYS)}
+        
+        self.stats = {
+            "lookups": 0,
+            "fallbacks": 0
+        }
+    
+    def __len__(self):
+        return len(self.location_ids)
+    
+    def __contains__(self, location_id):
+        return location_id in self._location_index
+    
+    def _materialize(self, locations):
+        """Predict the (locations, days, hours, events) price block of the given locations"""
+        if self.model is None:
+            raise ValueError("A PricePredictionModel is required to materialize prices")
+        
+        block = np.empty((len(locations), len(DAYS), len(HOURS), len(EVENTS)), dtype=np.float32)
+        for e, event in enumerate(EVENTS):
+            block[..., e] = self.model.predict_price_grid(locations.assign(special_event=event))
+        return block
+    
+    def build(self, locations):
+        """
+        Materialize prices for a table of locations, replacing the cube
+        
+        Args:
+            locations: DataFrame with one row of features per location and a
+                location_id column
+        """
+        if not locations['location_id'].is_unique:
+            raise ValueError("location_id values must be unique")
+        
+        start = time.perf_counter()
+        self.prices = self._materialize(locations)
+        self.location_ids = list(locations['location_id'])
+        self._location_index = {location_id: i for i, location_id in enumerate(self.location_ids)}
+        
+        print(f"Materialized {self.prices.size} prices for {len(self)} locations "
+              f"in {time.perf_counter() - start:.2f}s ({self.prices.nbytes / 1e6:.1f} MB)")
+    
+    def refresh(self, locations):
+        """
+        Re-materialize the prices of changed or new locations only
+        
+        Args:
+            locations: DataFrame with the current features of the locations
+                to refresh and a location_id column
+        """
+        if not locations['location_id'].is_unique:
+            raise ValueError("location_id values must be unique")
+        
+        block = self._materialize(locations)
+        
+        new_rows = []
+        for i, location_id in enumerate(locations['location_id']):
+            index = self._location_index.get(location_id)
+            if index is None:
+                self._location_index[location_id] = len(self.location_ids) + len(new_rows)
+                new_rows.append(i)
+            else:
+                self.prices[index] = block[i]
+        
+        if new_rows:
+            self.location_ids.extend(locations['location_id'].iloc[new_rows])
+            self.prices = np.concatenate([self.prices, block[new_rows]])
+        
+        print(f"Refreshed {len(locations) - len(new_rows)} locations, added {len(new_rows)}")
+    
+    def lookup(self, location_id, day_of_week, hour, special_event=False):
+        """
+        Return the materialized price of a key, or None if it is not in the cube
+        
+        Args:
+            location_id: Location id
+            day_of_week: Day name ('Monday' ... 'Sunday')
+            hour: Hour of the day (0-23)
+            special_event: True/False or 'Yes'/'No'
+        
+        Raises:
+            ValueError: If hour is outside 0-23
+        """
+        hour = int(_check_hours(hour))
+        self.stats["lookups"] += 1
+        index = self._location_index.get(location_id)
+        if index is None:
+            return None
+        return float(self.prices[index, self._day_index[day_of_week], hour, _event_index(special_event)])
+    
+    def lookup_many(self, location_ids, days_of_week, hours, special_events):
+        """
+        Vectorized lookup of many keys (all locations must be in the cube)
+        
+        Returns:
+            float32 array of prices
+        
+        Raises:
+            ValueError: If an hour is outside 0-23
+        """
+        hours = _check_hours(hours)
+        indices = np.fromiter((self._location_index[i] for i in location_ids), dtype=np.intp)
+        days = np.fromiter((self._day_index[d] for d in days_of_week), dtype=np.intp)
+        events = np.fromiter((_event_index(e) for e in special_events), dtype=np.intp)
+        self.stats["lookups"] += len(indices)
+        return self.prices[indices, days, hours, events]
+    
+    def quote(self, location_id, day_of_week, hour, special_event=False, features=None):
+        """
+        Quote a price from the cube, falling back to the model for unseen locations
+        
+        Args:
+            location_id: Location id
+            day_of_week: Day name ('Monday' ... 'Sunday')
+            hour: Hour of the day (0-23)
+            special_event: True/False or 'Yes'/'No'
+            features: One-row DataFrame with the location's features, needed
+                when the location is not in the cube
+        
+        Raises:
+            ValueError: If hour is outside 0-23
+        """
+        price = self.lookup(location_id, day_of_week, hour, special_event)
+        if price is not None:
+            return price
+        
+        if self.model is None or features is None:
+            raise KeyError(f"Location {location_id} is not in the price cube")
+        
+        self.stats["fallbacks"] += 1
+        row = features.iloc[:1].copy()
+        row['day_of_week'] = day_of_week
+        row['hour_of_day'] = hour
+        row['is_weekend'] = int(day_of_week in ['Saturday', 'Sunday'])
+        row['is_business_hours'] = int(8 <= hour <= 18)
+        row['special_event'] = EVENTS[_event_index(special_event)]
+        return float(self.model.predict_price(row)[0])
+    
+    def save(self, path="models/price_cube.npz"):
+        """Save the price array and location ids"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez(path, prices=self.prices, location_ids=np.asarray(self.location_ids))
+        print(f"Price cube saved to {path}")
+    
+    @classmethod
+    def load(cls, path, model=None):
+        """Load a cube saved with save (model is used for refreshes and fallbacks)"""
+        cube = cls(model)
+        with np.load(path) as data:
+            cube.prices = data["prices"]
+            cube.location_ids = data["location_ids"].tolist()
+        cube._location_index = {location_id: i for i, location_id in enumerate(cube.location_ids)}
+        return cube
+
+# Example usage
+if __name__ == "__main__":
+    from price_predictor import PricePredictionModel, generate_sample_pricing_data
+    
+    data = generate_sample_pricing_data(5000)
+    model = PricePredictionModel()
+    model.train(data.drop(columns=['price']), data['price'])
+    
+    locations = data.drop(columns=['price']).assign(location_id=np.arange(len(data)))
+    cube = PriceCube(model)
+    cube.build(locations.iloc[:4000])
+    cube.save("models/price_cube.npz")
+    
+    cube = PriceCube.load("models/price_cube.npz", model)
+    
+    # Quote latency: cube lookup vs model call
+    start = time.perf_counter()
+    for _ in range(10000):
+        cube.quote(17, 'Friday', 18, special_event=True)
+    lookup_us = (time.perf_counter() - start) / 10000 * 1e6
+    
+    start = time.perf_counter()
+    for _ in range(20):
+        cube.quote(4500, 'Friday', 18, special_event=True, features=locations.iloc[[4500]])
+    model_us = (time.perf_counter() - start) / 20 * 1e6
+    print(f"\nCube quote: {lookup_us:.1f} us, model fallback: {model_us:.0f} us")
+    
+    # A location's occupancy changed: refresh just that location
+    changed = locations.iloc[[17]].assign(historical_occupancy_rate=0.95)
+    before = cube.quote(17, 'Friday', 18, True)
+    cube.refresh(changed)
+    print(f"Location 17 Friday 18:00 with event: ₹{before:.2f} -> ₹{cube.quote(17, 'Friday', 18, True):.2f}")
@@ -8,27 +8,118 @@ It helps parking space owners set competitive prices.
 
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
-import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
 import os
+import time
+import tracemalloc
+from shared_models import compile_for_serving, get_memory_usage, load_artifact, save_artifact
+from table_chunks import iter_table_chunks
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+HOURS = list(range(24))
+
+# Pricing slots of the dynamic pricing suggestions: (label, time_of_day, is_business_hours)
+TIME_SLOTS = [
+    ('Morning (6-10)', 'Morning', 1),
+    ('Day (10-16)', 'Day', 1),
+    ('Evening (16-20)', 'Evening', 0),
+    ('Night (20-6)', 'Night', 0)
+]
+
+# Expected occupancy range of every slot on weekdays and weekends
+WEEKDAY_OCCUPANCY = [(0.7, 0.9), (0.5, 0.8), (0.7, 0.9), (0.2, 0.5)]
+WEEKEND_OCCUPANCY = [(0.4, 0.7), (0.4, 0.7), (0.6, 0.9), (0.6, 0.9)]
+
+def build_suggestion_features(locations, forecast_days=7, start_date=None, event_probability=0.2, seed=None):
+    """
+    Build the feature rows of every (location, day, time slot) for pricing suggestions
+    
+    Special events are sampled once per location and day and expected
+    occupancy per row, both from a generator seeded with seed, so a run
+    can be reproduced exactly.
+    
+    Args:
+        locations: DataFrame with one row of features per location
+        forecast_days: Number of days starting at start_date
+        start_date: First forecast day (defaults to today)
+        event_probability: Probability of a special event on a location day
+        seed: Random seed for event and occupancy sampling
+        
+    Returns:
+        DataFrame with len(locations) * forecast_days * 4 rows ordered by
+        location, day and slot, with the model features plus date, day and
+        time_slot columns
+    """
+    rng = np.random.default_rng(seed)
+    start_date = start_date or datetime.now()
+    
+    n_locations = len(locations)
+    n_slots = len(TIME_SLOTS)
+    rows_per_location = forecast_days * n_slots
+    
+    dates = [start_date + timedelta(days=i) for i in range(forecast_days)]
+    day_names = np.array([date.strftime("%A") for date in dates])
+    weekend = np.isin(day_names, ['Saturday', 'Sunday'])
+    
+    features = locations.iloc[np.repeat(np.arange(n_locations), rows_per_location)].reset_index(drop=True)
+    day_index = np.tile(np.repeat(np.arange(forecast_days), n_slots), n_locations)
+    slot_index = np.tile(np.arange(n_slots), forecast_days * n_locations)
+    
+    # One special event draw per location and day
+    events = rng.random((n_locations, forecast_days)) < event_probability
+    row_events = np.repeat(events.ravel(), n_slots)
+    
+    # Expected occupancy from the weekday/weekend slot ranges plus an event boost
+    ranges = np.where(weekend[day_index][:, None],
+                      np.asarray(WEEKEND_OCCUPANCY)[slot_index],
+                      np.asarray(WEEKDAY_OCCUPANCY)[slot_index])
+    occupancy = rng.uniform(ranges[:, 0], ranges[:, 1])
+    occupancy = np.where(row_events, np.minimum(occupancy + 0.15, 0.95), occupancy)
+    
+    features['date'] = np.array([date.strftime("%Y-%m-%d") for date in dates])[day_index]
+    features['day'] = day_names[day_index]
+    features['time_slot'] = np.array([slot[0] for slot in TIME_SLOTS])[slot_index]
+    features['day_of_week'] = features['day']
+    features['special_event'] = np.where(row_events, 'Yes', 'No')
+    features['time_of_day'] = np.array([slot[1] for slot in TIME_SLOTS])[slot_index]
+    features['is_business_hours'] = np.array([slot[2] for slot in TIME_SLOTS])[slot_index]
+    features['expected_occupancy'] = occupancy
+    return features
 
 class PricePredictionModel:
-    def __init__(self, model_path=None):
-        """Initialize price prediction model with option to load pre-trained model"""
+    def __init__(self, model_path=None, engine='gbr'):
+        """
+        Initialize price prediction model with option to load pre-trained model
+        
+        Args:
+            model_path: Path of a model saved with save_model
+            engine: Training engine of a new model
+                'gbr' - GradientBoostingRegressor on one-hot encoded categories
+                'hist' - HistGradientBoostingRegressor with native categorical
+                    splits, multi-threaded and suited to millions of rows
+        """
         self.numerical_features = ['distance_from_center', 'parking_capacity', 
                                   'historical_occupancy_rate', 'nearby_attractions_count']
         self.categorical_features = ['area_type', 'day_of_week', 'special_event']
+        self.engine = engine
+        self.training_stats = {}
         
         # Define preprocessing pipeline
-        numerical_transformer = StandardScaler()
-        categorical_transformer = OneHotEncoder(handle_unknown='ignore')
+        if engine == 'gbr':
+            numerical_transformer = StandardScaler()
+            categorical_transformer = OneHotEncoder(handle_unknown='ignore')
+        elif engine == 'hist':
+            # Trees need no scaling; categories are passed to the model as ordinal codes
+            numerical_transformer = 'passthrough'
+            categorical_transformer = OrdinalEncoder(handle_unknown='use_encoded_value',
+                                                     unknown_value=np.nan)
+        else:
+            raise ValueError(f"Unsupported training engine: {engine}")
         
         self.preprocessor = ColumnTransformer(
             transformers=[
@@ -39,25 +130,72 @@ class PricePredictionModel:
         # Create model pipeline
         if model_path and os.path.exists(model_path):
             print(f"Loading pre-trained price prediction model from {model_path}")
-            self.model = joblib.load(model_path)
+            self.model = load_artifact(model_path)
         else:
-            print("Initializing new price prediction model")
-            self.model = Pipeline(steps=[
-                ('preprocessor', self.preprocessor),
-                ('regressor', GradientBoostingRegressor(
+            print(f"Initializing new price prediction model ({engine})")
+            if engine == 'gbr':
+                regressor = GradientBoostingRegressor(
                     n_estimators=200, 
                     learning_rate=0.1,
                     max_depth=5, 
-                    random_state=42))
+                    random_state=42)
+            else:
+                n_numerical = len(self.numerical_features)
+                regressor = HistGradientBoostingRegressor(
+                    max_iter=200,
+                    learning_rate=0.1,
+                    max_depth=5,
+                    categorical_features=list(range(n_numerical, n_numerical + len(self.categorical_features))),
+                    random_state=42)
+            self.model = Pipeline(steps=[
+                ('preprocessor', self.preprocessor),
+                ('regressor', regressor)
             ])
     
-    def train(self, X, y):
-        """Train the price prediction model with provided data"""
+    def train(self, X, y, trace_memory=False):
+        """
+        Train the price prediction model with provided data
+        
+        Args:
+            X: Feature table
+            y: Prices
+            trace_memory: Also record the peak Python allocations of the fit
+                with tracemalloc. This slows training down several times
+                (and inflates train_seconds), so it is off by default and
+                only the process peak RSS is recorded
+        """
+        if not hasattr(self.model, 'fit'):
+            raise ValueError("Model was loaded from a shared serving artifact and cannot be trained")
+        
         print(f"Training price prediction model on {len(X)} samples")
-        self.model.fit(X, y)
+        
+        # Track wall time and peak memory of the fit
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            self.model.fit(X, y)
+        finally:
+            train_seconds = time.perf_counter() - start
+            if trace_memory:
+                _, peak_traced = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+        
+        self.training_stats = {
+            'rows': len(X),
+            'train_seconds': train_seconds,
+            'peak_traced_mb': peak_traced / 1e6 if trace_memory else None,
+            'peak_rss_mb': get_memory_usage()['peak_rss_mb']
+        }
+        if trace_memory:
+            print(f"Trained in {train_seconds:.2f}s "
+                  f"(peak allocations {self.training_stats['peak_traced_mb']:.1f} MB)")
+        else:
+            print(f"Trained in {train_seconds:.2f}s "
+                  f"(process peak RSS {self.training_stats['peak_rss_mb']:.1f} MB)")
         
         # If model is pipeline, get feature importances from final estimator
-        if isinstance(self.model, Pipeline):
+        if isinstance(self.model, Pipeline) and hasattr(self.model.named_steps['regressor'], 'feature_importances_'):
             print("Feature importances:")
             feature_names = (self.numerical_features + 
                             list(self.model.named_steps['preprocessor']
@@ -68,15 +206,71 @@ class PricePredictionModel:
             for name, importance in zip(feature_names, importances):
                 print(f"  {name}: {importance:.4f}")
     
+    def load_training_data(self, path, target_column='price', chunksize=100000):
+        """
+        Load a training table from disk chunk by chunk into compact columns
+        
+        Only the model features and the target are kept. Numerical columns
+        are stored as float32 and categorical columns as category codes, so
+        memory is far below loading the raw table as one DataFrame.
+        
+        Args:
+            path: CSV, JSONL or Parquet file
+            target_column: Column holding the price
+            chunksize: Number of rows read per chunk
+            
+        Returns:
+            Tuple of (features DataFrame, target array)
+        """
+        columns = self.numerical_features + self.categorical_features + [target_column]
+        numerical = {col: [] for col in self.numerical_features}
+        codes = {col: [] for col in self.categorical_features}
+        categories = {col: [] for col in self.categorical_features}
+        target = []
+        
+        rows = 0
+        for chunk in iter_table_chunks(path, chunksize, columns):
+            for col in self.numerical_features:
+                numerical[col].append(chunk[col].to_numpy(dtype=np.float32))
+            for col in self.categorical_features:
+                # Extend the category list with unseen values and keep only the codes
+                values = chunk[col].astype(str)
+                known = set(categories[col])
+                categories[col].extend(v for v in pd.unique(values) if v not in known)
+                codes[col].append(pd.Categorical(values, categories=categories[col]).codes.astype(np.int16))
+            target.append(chunk[target_column].to_numpy(dtype=np.float32))
+            rows += len(chunk)
+        
+        X = pd.DataFrame({col: np.concatenate(numerical[col]) for col in self.numerical_features})
+        for col in self.categorical_features:
+            X[col] = pd.Categorical.from_codes(np.concatenate(codes[col]), categories[col])
+        
+        print(f"Loaded {rows} training rows from {path} ({X.memory_usage(deep=True).sum() / 1e6:.1f} MB)")
+        return X, np.concatenate(target)
+    
+    def train_from_file(self, path, target_column='price', chunksize=100000, trace_memory=False):
+        """Load a training table with load_training_data and train on it"""
+        X, y = self.load_training_data(path, target_column, chunksize)
+        self.train(X, y, trace_memory)
+    
     def predict_price(self, features):
         """Predict optimal pricing based on provided features"""
         predictions = self.model.predict(features)
         return predictions
     
-    def save_model(self, path="models/price_predictor.pkl"):
-        """Save the trained model"""
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        joblib.dump(self.model, path)
+    def save_model(self, path="models/price_predictor.pkl", shared=False):
+        """
+        Save the trained model
+        
+        Args:
+            path: Model file
+            shared: Save a serving-only artifact with the boosted trees
+                compiled to flat arrays, which worker processes memory-map
+                instead of copying (it cannot be trained further). The
+                'hist' engine keeps its trees as plain arrays, so its model
+                is saved as is and memory-mapped directly
+        """
+        save_artifact(compile_for_serving(self.model) if shared else self.model, path)
         print(f"Price prediction model saved to {path}")
     
     def evaluate(self, X_test, y_test):
@@ -95,7 +289,20 @@ class PricePredictionModel:
         print(f"  Root Mean Squared Error: ₹{rmse:.2f}")
         print(f"  R² Score: {r2:.4f}")
         
+        metrics = {'mae': mae, 'rmse': rmse, 'r2': r2}
+        if self.training_stats:
+            print(f"  Training Time: {self.training_stats['train_seconds']:.2f}s "
+                  f"on {self.training_stats['rows']} rows")
+            if self.training_stats['peak_traced_mb'] is not None:
+                print(f"  Peak Training Memory: {self.training_stats['peak_traced_mb']:.1f} MB allocated, "
+                      f"{self.training_stats['peak_rss_mb']:.1f} MB process peak RSS")
+            else:
+                print(f"  Peak Training Memory: {self.training_stats['peak_rss_mb']:.1f} MB process peak RSS")
+            metrics.update(self.training_stats)
+        
         # Create visualization
+        import matplotlib.pyplot as plt
+        
         plt.figure(figsize=(10, 6))
         plt.scatter(y_test, y_pred, alpha=0.5)
         plt.plot([min(y_test), max(y_test)], [min(y_test), max(y_test)], 'r--')
@@ -107,37 +314,80 @@ class PricePredictionModel:
         # Save the evaluation plot
         os.makedirs("reports", exist_ok=True)
         plt.savefig("reports/price_prediction_evaluation.png")
+        plt.close()
         print("Evaluation plot saved to reports/price_prediction_evaluation.png")
         
-        return {'mae': mae, 'rmse': rmse, 'r2': r2}
-    
-    def generate_price_heatmap(self, location_id, base_features):
-        """Generate a heatmap of predicted prices by time and day"""
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        hours = list(range(24))
-        
-        price_matrix = np.zeros((len(days), len(hours)))
-        
-        for d, day in enumerate(days):
-            for h, hour in enumerate(hours):
-                # Copy base features and update time-based features
-                features = base_features.copy()
-                features.loc[0, 'day_of_week'] = day
-                features.loc[0, 'hour_of_day'] = hour
-                
-                # Add temporal factors
-                features.loc[0, 'is_weekend'] = 1 if day in ['Saturday', 'Sunday'] else 0
-                features.loc[0, 'is_business_hours'] = 1 if 8 <= hour <= 18 else 0
-                
-                # Predict price for this time slot
-                price = self.predict_price(features)[0]
-                price_matrix[d, h] = price
+        return metrics
+    
+    def build_price_grid_features(self, base_features):
+        """
+        Build the feature rows of every (location, day, hour) combination
+        
+        Args:
+            base_features: DataFrame with one row of features per location
+            
+        Returns:
+            DataFrame with len(base_features) * 7 * 24 rows, ordered by
+            location, then day (Monday first), then hour
+        """
+        n_locations = len(base_features)
+        slots = len(DAYS) * len(HOURS)
+        
+        grid = base_features.iloc[np.repeat(np.arange(n_locations), slots)].reset_index(drop=True)
+        days = np.tile(np.repeat(DAYS, len(HOURS)), n_locations)
+        hours = np.tile(HOURS, len(DAYS) * n_locations)
+        
+        grid['day_of_week'] = days
+        grid['hour_of_day'] = hours
+        
+        # Temporal factors
+        grid['is_weekend'] = np.isin(days, ['Saturday', 'Sunday']).astype(int)
+        grid['is_business_hours'] = ((hours >= 8) & (hours <= 18)).astype(int)
+        return grid
+    
+    def predict_price_grid(self, base_features):
+        """
+        Predict prices for every day of the week and hour of the day
+        
+        Args:
+            base_features: DataFrame with one row of features per location
+            
+        Returns:
+            Array of shape (locations, 7, 24) with the predicted prices
+        """
+        grid = self.build_price_grid_features(base_features)
+        prices = self.predict_price(grid)
+        return np.asarray(prices).reshape(len(base_features), len(DAYS), len(HOURS))
+    
+    def generate_price_heatmap(self, location_id, base_features, plot=True):
+        """
+        Generate a heatmap of predicted prices by time and day
+        
+        Args:
+            location_id: Location the features belong to (used in the plot title and file name)
+            base_features: DataFrame with the location's features (first row is used)
+            plot: Save the heatmap image (requires matplotlib and seaborn)
+            
+        Returns:
+            Array of shape (7, 24) with the predicted prices
+        """
+        price_matrix = self.predict_price_grid(base_features.iloc[:1])[0]
+        
+        if plot:
+            self.plot_price_heatmap(price_matrix, location_id)
+        
+        return price_matrix
+    
+    def plot_price_heatmap(self, price_matrix, location_id):
+        """Save a day x hour price matrix as a heatmap image"""
+        import matplotlib.pyplot as plt
+        import seaborn as sns
         
         # Create heatmap
         plt.figure(figsize=(15, 8))
         sns.heatmap(price_matrix, cmap="YlGnBu", 
-                   xticklabels=hours, 
-                   yticklabels=days,
+                   xticklabels=HOURS, 
+                   yticklabels=DAYS,
                    cbar_kws={'label': 'Price (₹)'})
         plt.xlabel('Hour of Day')
         plt.ylabel('Day of Week')
@@ -146,74 +396,37 @@ class PricePredictionModel:
         # Save the heatmap
         os.makedirs("reports", exist_ok=True)
         plt.savefig(f"reports/price_heatmap_location_{location_id}.png")
+        plt.close()
         print(f"Price heatmap saved to reports/price_heatmap_location_{location_id}.png")
-        
-        return price_matrix
     
-    def generate_dynamic_pricing_suggestions(self, location_data, forecast_days=7):
-        """Generate dynamic pricing suggestions for upcoming days"""
-        today = datetime.now()
-        suggestions = []
+    def generate_dynamic_pricing_suggestions(self, location_data, forecast_days=7, seed=None):
+        """
+        Generate dynamic pricing suggestions for upcoming days
         
-        for i in range(forecast_days):
-            forecast_date = today + timedelta(days=i)
-            day_name = forecast_date.strftime("%A")
-            
-            # Create feature set for this forecast day
-            features = location_data.copy()
-            features.loc[0, 'day_of_week'] = day_name
-            
-            # Check for special events (in a real system, this would query an events API)
-            is_special_event = np.random.choice([True, False], p=[0.2, 0.8])
-            features.loc[0, 'special_event'] = 'Yes' if is_special_event else 'No'
+        Args:
+            location_data: DataFrame with the location's features (first row is used)
+            forecast_days: Number of days to suggest prices for
+            seed: Random seed for the special event and occupancy sampling
             
-            # Generate predictions for different times of day
-            time_slots = ['Morning (6-10)', 'Day (10-16)', 'Evening (16-20)', 'Night (20-6)']
-            hourly_predictions = {}
-            
-            for slot in time_slots:
-                if 'Morning' in slot:
-                    features.loc[0, 'time_of_day'] = 'Morning'
-                    features.loc[0, 'is_business_hours'] = 1
-                elif 'Day' in slot:
-                    features.loc[0, 'time_of_day'] = 'Day'
-                    features.loc[0, 'is_business_hours'] = 1
-                elif 'Evening' in slot:
-                    features.loc[0, 'time_of_day'] = 'Evening'
-                    features.loc[0, 'is_business_hours'] = 0
-                else:
-                    features.loc[0, 'time_of_day'] = 'Night'
-                    features.loc[0, 'is_business_hours'] = 0
-                
-                # Add expected occupancy based on historical data and day/time
-                if day_name in ['Saturday', 'Sunday']:
-                    if slot in ['Morning (6-10)', 'Day (10-16)']:
-                        features.loc[0, 'expected_occupancy'] = np.random.uniform(0.4, 0.7)
-                    else:
-                        features.loc[0, 'expected_occupancy'] = np.random.uniform(0.6, 0.9)
-                else:  # Weekday
-                    if slot in ['Morning (6-10)', 'Evening (16-20)']:
-                        features.loc[0, 'expected_occupancy'] = np.random.uniform(0.7, 0.9)
-                    elif slot == 'Day (10-16)':
-                        features.loc[0, 'expected_occupancy'] = np.random.uniform(0.5, 0.8)
-                    else:
-                        features.loc[0, 'expected_occupancy'] = np.random.uniform(0.2, 0.5)
-                
-                # Apply special event boost if applicable
-                if is_special_event:
-                    features.loc[0, 'expected_occupancy'] += 0.15
-                    features.loc[0, 'expected_occupancy'] = min(features.loc[0, 'expected_occupancy'], 0.95)
-                
-                # Predict price
-                price = self.predict_price(features)[0]
-                hourly_predictions[slot] = round(price, 2)
-            
-            # Add to suggestions
+        Returns:
+            List of per-day dictionaries with the suggested price of every time slot
+        """
+        # Special events are sampled here; in a real system, this would query an events API
+        features = build_suggestion_features(location_data.iloc[:1], forecast_days, seed=seed)
+        prices = self.predict_price(features)
+        
+        suggestions = []
+        n_slots = len(TIME_SLOTS)
+        for i in range(forecast_days):
+            day = features.iloc[i * n_slots]
             suggestions.append({
-                'date': forecast_date.strftime("%Y-%m-%d"),
-                'day': day_name,
-                'special_event': is_special_event,
-                'price_suggestions': hourly_predictions
+                'date': day['date'],
+                'day': day['day'],
+                'special_event': day['special_event'] == 'Yes',
+                'price_suggestions': {
+                    slot[0]: round(float(prices[i * n_slots + j]), 2)
+                    for j, slot in enumerate(TIME_SLOTS)
+                }
             })
         
         return suggestions
@@ -241,4 +454,42 @@ def generate_sample_pricing_data(n_samples=1000):
     })
     
     # Derive features
-    data['is_weekend'] = data
\ No newline at end of file
+    data['is_weekend'] = data['day_of_week'].isin(['Saturday', 'Sunday']).astype(int)
+    data['is_business_hours'] = data['hour_of_day'].between(8, 18).astype(int)
+    
+    # Generate target - hourly price (₹) driven by location, demand and events
+    area_premium = data['area_type'].map({'Commercial': 15, 'Mixed': 10, 'Residential': 5, 'Industrial': 3})
+    price = (
+        40 - 2.5 * data['distance_from_center'] +
+        area_premium +
+        30 * data['historical_occupancy_rate'] +
+        1.5 * data['nearby_attractions_count'] +
+        8 * data['is_weekend'] +
+        np.where(data['special_event'] == 'Yes', 20, 0) +
+        np.random.normal(0, 3, n_samples)
+    )
+    data['price'] = np.round(np.clip(price, 10, None), 2)
+    
+    return data
+
+# Example usage
+if __name__ == "__main__":
+    data = generate_sample_pricing_data(2000)
+    X = data.drop(columns=['price'])
+    y = data['price']
+    
+    model = PricePredictionModel()
+    model.train(X, y)
+    
+    # Prices for every day and hour of every location in one call
+    locations = X.drop_duplicates('location_id').head(50)
+    start = time.perf_counter()
+    grid = model.predict_price_grid(locations)
+    print(f"\nPrice grid {grid.shape} predicted in {(time.perf_counter() - start) * 1000:.1f} ms")
+    
+    heatmap = model.generate_price_heatmap(int(locations.iloc[0]['location_id']), locations.iloc[:1], plot=False)
+    print(f"Location {int(locations.iloc[0]['location_id'])}: ₹{heatmap.min():.2f} - ₹{heatmap.max():.2f}")
+    
+    for suggestion in model.generate_dynamic_pricing_suggestions(locations.iloc[:1], seed=42)[:3]:
+        event = " (special event)" if suggestion['special_event'] else ""
+        print(f"{suggestion['date']} {suggestion['day']}{event}: {suggestion['price_suggestions']}")
\ No newline at end of file
@@ -8,20 +8,180 @@ optimal parking spots based on user history, location data, and current availabi
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
+from sklearn.neighbors import BallTree
+from forest_inference import CompiledForest, check_parity
+from shared_models import compile_for_serving, load_artifact, save_artifact
+from table_chunks import iter_table_chunks
 from sklearn.preprocessing import StandardScaler
-import joblib
 import os
+import time
+from collections import OrderedDict
+
+def iter_feedback_chunks(path, chunksize=10000):
+    """
+    Read user feedback from disk in chunks
+    
+    Args:
+        path: CSV (.csv), JSON lines (.jsonl/.ndjson) or Parquet (.parquet) file
+        chunksize: Number of rows per chunk
+        
+    Yields:
+        DataFrames of at most chunksize rows
+    """
+    return iter_table_chunks(path, chunksize)
+
+class SpotIndex:
+    EARTH_RADIUS_KM = 6371.0
+    
+    def __init__(self, parking_spots):
+        """
+        Build a spatial index over parking spot coordinates
+        
+        Args:
+            parking_spots: List of parking spot dictionaries with 'latitude'
+                and 'longitude' (in degrees)
+        """
+        self.spots = list(parking_spots)
+        coords = np.radians([[spot['latitude'], spot['longitude']] for spot in self.spots])
+        self.tree = BallTree(coords.reshape(-1, 2), metric='haversine')
+    
+    def __len__(self):
+        return len(self.spots)
+    
+    def query_radius(self, latitude, longitude, radius_km):
+        """
+        Find all spots within a radius of a location
+        
+        Args:
+            latitude: Latitude of the destination in degrees
+            longitude: Longitude of the destination in degrees
+            radius_km: Search radius in kilometers
+            
+        Returns:
+            Tuple of (spot indices, distances in km)
+        """
+        point = np.radians([[latitude, longitude]])
+        indices, distances = self.tree.query_radius(
+            point, r=radius_km / self.EARTH_RADIUS_KM, return_distance=True
+        )
+        return indices[0], distances[0] * self.EARTH_RADIUS_KM
+
+class ScoreCache:
+    def __init__(self, max_size=50000, ttl=300.0):
+        """
+        Bounded LRU cache with a time-to-live for spot scores
+        
+        Args:
+            max_size: Maximum number of cached scores
+            ttl: Seconds a cached score stays valid (None = no expiry)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0
+        }
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, key, now=None):
+        """Return the cached score for key, or None on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        
+        score, expires = entry
+        if expires is not None and (now if now is not None else time.monotonic()) >= expires:
+            del self._entries[key]
+            self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return score
+    
+    def put(self, key, score, now=None):
+        """Store a score, evicting the least recently used entries when full"""
+        if self.max_size <= 0:
+            return
+        expires = None
+        if self.ttl is not None:
+            expires = (now if now is not None else time.monotonic()) + self.ttl
+        self._entries[key] = (score, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+    
+    def clear(self):
+        """Drop all cached scores"""
+        self._entries.clear()
 
 class ParkingRecommender:
-    def __init__(self, model_path=None):
-        """Initialize the recommendation engine with pretrained model if available"""
+    # Category layouts of the one-hot encoded context features (first category is dropped)
+    DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    TIMES = ['morning', 'afternoon', 'evening', 'night']
+    
+    # Spot attribute behind each model feature when scoring parking spots
+    SPOT_FIELDS = {
+        'distance': 'distance_from_destination',
+        'price': 'hourly_rate',
+        'security_rating': 'security_rating',
+        'covered': 'is_covered',
+        'historical_occupancy': 'avg_occupancy',
+        'user_rating': 'avg_rating'
+    }
+    
+    def __init__(self, model_path=None, cache_size=50000, cache_ttl=300.0, distance_resolution=None,
+                 compiled=False):
+        """
+        Initialize the recommendation engine with pretrained model if available
+        
+        Args:
+            model_path: Path of a model saved with save_model
+            cache_size: Maximum number of cached spot scores (0 disables the cache)
+            cache_ttl: Seconds a cached score stays valid
+            distance_resolution: Optional distance (km) spot distances are
+                rounded to before cached scoring, so cached scores can be shared
+                between nearby destinations. This is an approximation: scores
+                then change by up to a few thousandths. None scores the exact
+                distances
+            compiled: Score with a CompiledForest exported from the trained
+                model instead of sklearn's predict (faster for small batches)
+        """
         self.features = ['distance', 'price', 'security_rating', 'covered', 'time_of_day', 
                          'day_of_week', 'historical_occupancy', 'user_rating']
+        self.num_features = ['distance', 'price', 'security_rating', 'historical_occupancy', 'user_rating']
+        self.feature_columns = (self.num_features + ['covered'] +
+                                [f'time_of_day_{t}' for t in self.TIMES[1:]] +
+                                [f'day_of_week_{d}' for d in self.DAYS[1:]])
         self.scaler = StandardScaler()
+        self.scaler_fitted = False
+        self.spot_index = None
+        self.spot_columns = None
+        self._spot_positions = {}
+        self.compiled = compiled
+        self.compiled_model = None
+        
+        # Progress of incremental training, saved with the model
+        self.training_state = {'source': None, 'chunks': 0, 'rows': 0, 'rounds': 0, 'complete': True}
+        
+        # Score cache keyed by (spot id, spot version, time_of_day, day_of_week, distance,
+        # other spot attributes), so callers passing changed attributes never get stale scores
+        self.score_cache = ScoreCache(cache_size, cache_ttl)
+        self.distance_resolution = distance_resolution
+        self._spot_versions = {}
+        self.cache_invalidations = 0
         
         if model_path and os.path.exists(model_path):
             print(f"Loading pre-trained model from {model_path}")
-            self.model = joblib.load(model_path)
+            self._load_artifact(load_artifact(model_path))
         else:
             print("Initializing new model")
             self.model = RandomForestRegressor(
@@ -30,76 +190,488 @@ class ParkingRecommender:
                 random_state=42
             )
     
+    def _load_artifact(self, artifact):
+        """Restore the model and its fitted feature pipeline from a saved artifact"""
+        self.score_cache.clear()
+        if isinstance(artifact, dict):
+            self.model = artifact['model']
+            self.scaler = artifact['scaler']
+            self.feature_columns = artifact['feature_columns']
+            self.scaler_fitted = True
+            self.training_state = artifact.get('training_state', self.training_state)
+            # Shared serving artifacts only contain the compiled forest
+            self.compiled_model = artifact.get('compiled_model')
+        else:
+            # Older artifacts only contain the estimator
+            print("Warning: model file has no fitted preprocessor, "
+                  "spot features will be scaled per request")
+            self.model = artifact
+            self.compiled_model = None
+        
+        if self.compiled and self.compiled_model is None:
+            self.compile_model()
+    
+    def _check_trainable(self):
+        """Raise if the model was loaded from a serving-only artifact"""
+        if self.model is None:
+            raise ValueError("Model was loaded from a shared serving artifact and cannot be trained")
+    
+    def compile_model(self, X_check=None):
+        """
+        Export the trained forest into flat arrays for fast inference
+        
+        Args:
+            X_check: Optional feature matrix to verify the compiled model
+                reproduces the sklearn predictions on
+        """
+        self.compiled_model = CompiledForest.from_sklearn(self.model)
+        if X_check is not None:
+            difference = check_parity(self.model, self.compiled_model, X_check)
+            print(f"Compiled model matches sklearn (max difference {difference:.2e})")
+        self.score_cache.clear()
+    
+    def build_feature_matrix(self, numeric, covered, time_of_day, day_of_week):
+        """
+        Build the model feature matrix directly with NumPy
+        
+        Args:
+            numeric: Dictionary of the numerical features (distance, price,
+                security_rating, historical_occupancy, user_rating) as arrays
+            covered: Array (or scalar) of covered flags
+            time_of_day: Array or single value of time-of-day categories
+            day_of_week: Array or single value of day names
+            
+        Returns:
+            float64 array of shape (n_samples, len(self.feature_columns))
+        """
+        num = np.column_stack([np.asarray(numeric[f], dtype=np.float64) for f in self.num_features])
+        n = len(num)
+        
+        # Scale numerical features with the fitted scaler (models saved without
+        # one are scaled on the data at hand, as before)
+        if not self.scaler_fitted:
+            self.scaler.fit(num)
+        num = (num - self.scaler.mean_) / self.scaler.scale_
+        
+        X = np.empty((n, len(self.feature_columns)), dtype=np.float64)
+        X[:, :len(self.num_features)] = num
+        col = len(self.num_features)
+        X[:, col] = np.broadcast_to(np.asarray(covered, dtype=np.float64), n)
+        col += 1
+        
+        # One-hot encode categorical features against the fixed category layout
+        for values, categories in ((time_of_day, self.TIMES), (day_of_week, self.DAYS)):
+            values = np.asarray(values).reshape(-1, 1)
+            X[:, col:col + len(categories) - 1] = values == np.asarray(categories[1:])
+            col += len(categories) - 1
+        
+        return X
+    
     def preprocess_data(self, data):
         """Preprocess the input data for prediction"""
         # Extract features
         X = pd.DataFrame(data)[self.features]
         
-        # Handle categorical features
-        X['covered'] = X['covered'].astype(int)
-        X['day_of_week'] = pd.Categorical(X['day_of_week'], 
-                                          categories=['Monday', 'Tuesday', 'Wednesday', 
-                                                      'Thursday', 'Friday', 'Saturday', 'Sunday'])
-        X = pd.get_dummies(X, columns=['day_of_week'], drop_first=True)
-        
-        # Scale numerical features
-        num_features = ['distance', 'price', 'security_rating', 'historical_occupancy', 'user_rating']
-        X[num_features] = self.scaler.fit_transform(X[num_features])
+        X = self.build_feature_matrix(
+            {f: X[f].to_numpy() for f in self.num_features},
+            X['covered'].astype(int).to_numpy(),
+            X['time_of_day'].to_numpy(),
+            X['day_of_week'].to_numpy()
+        )
         
-        return X
+        return pd.DataFrame(X, columns=self.feature_columns)
     
     def train(self, X_data, y_data):
         """Train the recommendation model"""
+        self._check_trainable()
+        
+        # Fit the scaler on the training data only; predictions reuse it
+        self.scaler_fitted = False
         X = self.preprocess_data(X_data)
+        self.scaler_fitted = True
+        
         print(f"Training model on {len(X)} samples")
-        self.model.fit(X, y_data)
+        self.model.fit(X.to_numpy(), y_data)
+        self.score_cache.clear()
+        
+        self.compiled_model = None
+        if self.compiled:
+            self.compile_model(X.to_numpy())
+    
+    def train_incremental(self, feedback_path, target_column='score', chunksize=10000,
+                          trees_per_chunk=10, max_trees=200, checkpoint_path=None, resume=True):
+        """
+        Update the model from a feedback file without refitting on all history
+        
+        The feedback is read chunk by chunk. Every chunk grows the forest by
+        trees_per_chunk new trees fitted on that chunk only (warm start) and
+        the oldest trees are retired once the forest exceeds max_trees, so
+        memory is bounded by the chunk size and the forest size. The feature
+        scaler is fitted on the first chunk if the model has none and kept
+        fixed afterwards, since existing trees depend on it.
+        
+        Args:
+            feedback_path: CSV, JSONL or Parquet file with the model features
+                and the target column
+            target_column: Column holding the user satisfaction score
+            chunksize: Number of feedback rows per chunk
+            trees_per_chunk: Number of trees added per chunk
+            max_trees: Maximum number of trees kept in the forest
+            checkpoint_path: Save the model here after every chunk
+            resume: Skip the chunks recorded in the training state of a
+                previous run that was interrupted on this same file (same
+                path, size, modification time and chunksize); a finished run
+                or a rewritten file is trained on from the start
+                
+        Returns:
+            Dictionary with the number of chunks and rows trained on in this run
+        """
+        self._check_trainable()
+        
+        source = os.path.abspath(feedback_path)
+        stat = os.stat(source)
+        # Identifies this version of the file, so new data written to the same path is not skipped
+        identity = {'source': source, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                    'chunksize': chunksize}
+        
+        # Rounds count every incremental fit of this model, across feedback files
+        rounds = self.training_state.get('rounds', 0)
+        state = self.training_state
+        if (resume and not state.get('complete', True) and
+                all(state.get(key) == value for key, value in identity.items())):
+            skip = state['chunks']
+            print(f"Resuming {feedback_path} after {skip} chunks")
+        else:
+            skip = 0
+            self.training_state = dict(identity, chunks=0, rows=0, rounds=rounds, complete=False)
+        
+        params = self.model.get_params()
+        chunks = 0
+        rows = 0
+        for index, chunk in enumerate(iter_feedback_chunks(feedback_path, chunksize)):
+            if index < skip:
+                continue
+            
+            X = self.build_feature_matrix(
+                {f: chunk[f].to_numpy() for f in self.num_features},
+                chunk['covered'].astype(int).to_numpy(),
+                chunk['time_of_day'].to_numpy(),
+                chunk['day_of_week'].to_numpy()
+            )
+            self.scaler_fitted = True
+            
+            # Grow the forest with trees fitted on this chunk only
+            trained = len(getattr(self.model, 'estimators_', []))
+            incremental = {'warm_start': True, 'n_estimators': trained + trees_per_chunk}
+            if isinstance(params['random_state'], (int, np.integer)):
+                # sklearn seeds new trees from random_state and the number of
+                # existing trees, which stays at max_trees once trees are retired;
+                # a seed per round keeps the trees of every round distinct
+                seed = np.random.RandomState([params['random_state'], rounds]).randint(2**31 - 1)
+                incremental['random_state'] = int(seed)
+            self.model.set_params(**incremental)
+            try:
+                self.model.fit(X, chunk[target_column].to_numpy())
+            finally:
+                # Restore the configuration so a later full train() refits from
+                # scratch and checkpoints keep the original parameters
+                self.model.set_params(warm_start=params['warm_start'],
+                                      n_estimators=params['n_estimators'],
+                                      random_state=params['random_state'])
+            rounds += 1
+            
+            # Retire the oldest trees
+            if len(self.model.estimators_) > max_trees:
+                self.model.estimators_ = self.model.estimators_[-max_trees:]
+            
+            chunks += 1
+            rows += len(chunk)
+            self.training_state['chunks'] = index + 1
+            self.training_state['rows'] += len(chunk)
+            self.training_state['rounds'] = rounds
+            print(f"Chunk {index + 1}: {len(chunk)} rows, {len(self.model.estimators_)} trees")
+            
+            if checkpoint_path:
+                self.save_model(checkpoint_path)
+        
+        self.training_state['complete'] = True
+        if checkpoint_path:
+            self.save_model(checkpoint_path)
+        
+        self.score_cache.clear()
+        self.compiled_model = None
+        if self.compiled and hasattr(self.model, 'estimators_'):
+            self.compile_model()
         
-    def save_model(self, path="models/parking_recommender.pkl"):
-        """Save the trained model"""
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        joblib.dump(self.model, path)
+        return {'chunks': chunks, 'rows': rows}
+    
+    def save_model(self, path="models/parking_recommender.pkl", shared=False):
+        """
+        Save the trained model together with its fitted feature pipeline
+        
+        Args:
+            path: Model file
+            shared: Save a serving-only artifact holding the compiled forest,
+                which worker processes memory-map instead of copying (it
+                cannot be trained further)
+        """
+        artifact = {
+            'model': self.model,
+            'scaler': self.scaler,
+            'feature_columns': self.feature_columns,
+            'training_state': self.training_state
+        }
+        if shared:
+            artifact['model'] = None
+            artifact['compiled_model'] = compile_for_serving(
+                self.compiled_model if self.compiled_model is not None else self.model
+            )
+        
+        save_artifact(artifact, path)
         print(f"Model saved to {path}")
     
-    def predict_parking_score(self, parking_spots, user_preferences):
+    def spots_to_columns(self, parking_spots, fields=None):
+        """Convert a list of parking spot dictionaries to columnar arrays"""
+        n = len(parking_spots)
+        if fields is None:
+            fields = self.SPOT_FIELDS.values()
+        return {
+            field: np.fromiter((spot[field] for spot in parking_spots), dtype=np.float64, count=n)
+            for field in fields
+        }
+    
+    @staticmethod
+    def select_top_k(scores, top_k=None, offset=0):
+        """
+        Indices of the best scores in descending order
+        
+        Uses a partial selection so only the requested page is sorted.
+        
+        Args:
+            scores: Array of scores
+            top_k: Number of results to return (None = all)
+            offset: Number of best results to skip (for pagination)
+            
+        Returns:
+            Array of indices into scores
+        """
+        n = len(scores)
+        end = n if top_k is None else min(offset + top_k, n)
+        if offset >= end:
+            return np.zeros(0, dtype=np.intp)
+        
+        neg = -np.asarray(scores)
+        if end < n:
+            best = np.argpartition(neg, end - 1)[:end]
+            order = best[np.argsort(neg[best], kind='stable')]
+        else:
+            order = np.argsort(neg, kind='stable')
+        return order[offset:end]
+    
+    def build_spot_index(self, parking_spots):
+        """
+        Index the parking spots of a city for radius search
+        
+        Args:
+            parking_spots: List of parking spot dictionaries with 'latitude',
+                'longitude' and the static spot attributes (hourly_rate,
+                security_rating, is_covered, avg_occupancy, avg_rating)
+        """
+        self.spot_index = SpotIndex(parking_spots)
+        static_fields = [f for f in self.SPOT_FIELDS.values() if f != 'distance_from_destination']
+        self.spot_columns = self.spots_to_columns(self.spot_index.spots, static_fields)
+        self._spot_positions = {spot['id']: i for i, spot in enumerate(self.spot_index.spots)}
+        print(f"Indexed {len(self.spot_index)} parking spots")
+    
+    def invalidate_spot(self, spot_id):
+        """
+        Invalidate the cached scores of a spot after its attributes changed
+        
+        Bumps the spot's feature version, so scores cached for the old
+        version are never returned again (and age out of the LRU cache).
+        """
+        self._spot_versions[spot_id] = self._spot_versions.get(spot_id, 0) + 1
+        self.cache_invalidations += 1
+    
+    def update_spot(self, spot_id, **attributes):
+        """
+        Update attributes (e.g. hourly_rate, avg_rating, avg_occupancy) of an
+        indexed spot and invalidate its cached scores
+        """
+        position = self._spot_positions.get(spot_id)
+        if position is None:
+            raise KeyError(f"Spot {spot_id} is not indexed")
+        
+        spot = self.spot_index.spots[position]
+        spot.update(attributes)
+        for field, value in attributes.items():
+            if field in self.spot_columns:
+                self.spot_columns[field][position] = value
+        self.invalidate_spot(spot_id)
+    
+    def clear_score_cache(self):
+        """Drop all cached scores"""
+        self.score_cache.clear()
+    
+    def get_cache_stats(self):
+        """Return hit/miss/eviction counters and the current size of the score cache"""
+        stats = dict(self.score_cache.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["invalidations"] = self.cache_invalidations
+        stats["size"] = len(self.score_cache)
+        stats["max_size"] = self.score_cache.max_size
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+    
+    def recommend(self, destination, user_preferences, radius_km=1.0, top_k=10, offset=0):
+        """
+        Recommend the best indexed parking spots near a destination
+        
+        Only spots within radius_km of the destination are scored, with the
+        distance computed from the spot coordinates.
+        
+        Args:
+            destination: (latitude, longitude) of the destination in degrees
+            user_preferences: Dictionary with time_of_day and day_of_week
+            radius_km: Search radius in kilometers
+            top_k: Page size, or None for all remaining results
+            offset: Number of better results to skip (for pagination)
+            
+        Returns:
+            Dictionary with the page of results, the number of candidates in
+            range and the offset of the next page (None on the last page)
+        """
+        if self.spot_index is None:
+            raise ValueError("No spot index built, call build_spot_index first")
+        
+        indices, distances = self.spot_index.query_radius(destination[0], destination[1], radius_km)
+        
+        spot_arrays = {field: column[indices] for field, column in self.spot_columns.items()}
+        spot_arrays['distance_from_destination'] = distances
+        spot_ids = [self.spot_index.spots[i]['id'] for i in indices]
+        scores = self.score_spot_arrays(spot_arrays, user_preferences, spot_ids)
+        
+        results = []
+        for i in self.select_top_k(scores, top_k, offset):
+            results.append({
+                'spot_id': self.spot_index.spots[indices[i]]['id'],
+                'score': float(scores[i]),
+                'distance': float(distances[i]),
+                'spot_data': self.spot_index.spots[indices[i]]
+            })
+        
+        if top_k is None:
+            next_offset = None
+        else:
+            next_offset = offset + top_k
+            if next_offset >= len(indices):
+                next_offset = None
+        return {
+            'results': results,
+            'total_candidates': len(indices),
+            'offset': offset,
+            'next_offset': next_offset
+        }
+    
+    def score_spot_arrays(self, spot_arrays, user_preferences, spot_ids=None):
+        """
+        Score parking spots given as columnar arrays
+        
+        Args:
+            spot_arrays: Dictionary of arrays keyed by spot attribute
+                (distance_from_destination, hourly_rate, security_rating,
+                is_covered, avg_occupancy, avg_rating)
+            user_preferences: Dictionary with time_of_day and day_of_week,
+                either single values or one value per spot
+            spot_ids: Optional spot ids; enables the score cache. Cached
+                scores are only reused when all attribute values match
+            
+        Returns:
+            Array with the suitability score of every spot
+        """
+        if spot_ids is None or self.score_cache.max_size <= 0 or not self.scaler_fitted:
+            return self._score_arrays(spot_arrays, user_preferences)
+        
+        distance_field = self.SPOT_FIELDS['distance']
+        distances = np.asarray(spot_arrays[distance_field], dtype=np.float64)
+        if self.distance_resolution:
+            # Snap distances to the cache resolution so cached and fresh scores agree
+            distances = np.rint(distances / self.distance_resolution) * self.distance_resolution
+        n = len(distances)
+        attributes = zip(*[np.asarray(spot_arrays[field]).tolist()
+                           for field in self.SPOT_FIELDS.values() if field != distance_field])
+        times = np.broadcast_to(np.asarray(user_preferences['time_of_day']), n).tolist()
+        days = np.broadcast_to(np.asarray(user_preferences['day_of_week']), n).tolist()
+        
+        now = time.monotonic()
+        scores = np.empty(n, dtype=np.float64)
+        keys = []
+        missing = []
+        for i, (spot_id, distance, values) in enumerate(zip(spot_ids, distances.tolist(), attributes)):
+            key = (spot_id, self._spot_versions.get(spot_id, 0), times[i], days[i], distance, values)
+            score = self.score_cache.get(key, now)
+            if score is None:
+                missing.append(i)
+                keys.append(key)
+            else:
+                scores[i] = score
+        
+        if missing:
+            missing = np.asarray(missing)
+            arrays = {field: np.asarray(values)[missing] for field, values in spot_arrays.items()}
+            arrays[distance_field] = distances[missing]
+            fresh = self._score_arrays(arrays, {
+                'time_of_day': np.asarray(times)[missing],
+                'day_of_week': np.asarray(days)[missing]
+            })
+            scores[missing] = fresh
+            for key, score in zip(keys, fresh.tolist()):
+                self.score_cache.put(key, score, now)
+        
+        return scores
+    
+    def _score_arrays(self, spot_arrays, user_preferences):
+        """Run the model on columnar spot arrays"""
+        if len(spot_arrays[self.SPOT_FIELDS['distance']]) == 0:
+            return np.zeros(0)
+        
+        numeric = {f: spot_arrays[self.SPOT_FIELDS[f]] for f in self.num_features}
+        X = self.build_feature_matrix(
+            numeric,
+            spot_arrays[self.SPOT_FIELDS['covered']],
+            user_preferences['time_of_day'],
+            user_preferences['day_of_week']
+        )
+        if self.compiled_model is not None:
+            return self.compiled_model.predict(X)
+        return self.model.predict(X)
+    
+    def predict_parking_score(self, parking_spots, user_preferences, top_k=None):
         """
         Predict the suitability score for each parking spot based on 
         user preferences and current context
+        
+        Returns the spots sorted by score (descending), only the best top_k
+        if given.
         """
-        # Prepare data for prediction
-        prediction_data = []
-        
-        for spot in parking_spots:
-            # Combine spot data with context and user preferences
-            spot_features = {
-                'distance': spot['distance_from_destination'],
-                'price': spot['hourly_rate'],
-                'security_rating': spot['security_rating'],
-                'covered': 1 if spot['is_covered'] else 0,
-                'time_of_day': user_preferences['time_of_day'],
-                'day_of_week': user_preferences['day_of_week'],
-                'historical_occupancy': spot['avg_occupancy'],
-                'user_rating': spot['avg_rating']
-            }
-            prediction_data.append(spot_features)
-        
-        # Preprocess data
-        X_pred = self.preprocess_data(prediction_data)
-        
-        # Get predictions
-        scores = self.model.predict(X_pred)
-        
-        # Combine with parking spot IDs
+        # Score all spots from columnar arrays
+        scores = self.score_spot_arrays(
+            self.spots_to_columns(parking_spots),
+            user_preferences,
+            [spot['id'] for spot in parking_spots]
+        )
+        return self.rank_spots(parking_spots, scores, top_k)
+    
+    def rank_spots(self, parking_spots, scores, top_k=None):
+        """Combine parking spots with their scores, best first"""
         results = []
-        for i, score in enumerate(scores):
+        for i in self.select_top_k(scores, top_k):
             results.append({
                 'spot_id': parking_spots[i]['id'],
-                'score': float(score),
+                'score': float(scores[i]),
                 'spot_data': parking_spots[i]
             })
         
-        # Sort by score (descending)
-        results.sort(key=lambda x: x['score'], reverse=True)
-        
         return results
 
 # Demo function to generate sample training data
@@ -179,4 +751,39 @@ if __name__ == "__main__":
     recommendations = recommender.predict_parking_score(sample_spots, user_prefs)
     print("\nRecommended Parking Spots:")
     for rec in recommendations:
-        print(f"Spot {rec['spot_id']}: Score {rec['score']:.4f}")
\ No newline at end of file
+        print(f"Spot {rec['spot_id']}: Score {rec['score']:.4f}")
+    
+    # Incremental update from a day of booking feedback
+    feedback, feedback_scores = generate_sample_data(5000)
+    feedback = pd.DataFrame(feedback)
+    feedback['score'] = feedback_scores
+    feedback.to_csv("models/feedback.csv", index=False)
+    recommender.train_incremental("models/feedback.csv", chunksize=2000,
+                                  checkpoint_path="models/parking_recommender.pkl")
+    
+    # Radius search over a city-wide spot index
+    city_spots = [
+        {
+            'id': f'city_{i:05d}',
+            'latitude': 12.90 + np.random.uniform(0, 0.1),
+            'longitude': 77.55 + np.random.uniform(0, 0.1),
+            'hourly_rate': np.random.uniform(1.0, 15.0),
+            'security_rating': np.random.uniform(1.0, 5.0),
+            'is_covered': bool(np.random.randint(2)),
+            'avg_occupancy': np.random.uniform(0.1, 1.0),
+            'avg_rating': np.random.uniform(1.0, 5.0)
+        }
+        for i in range(20000)
+    ]
+    recommender.build_spot_index(city_spots)
+    
+    page = recommender.recommend((12.95, 77.60), user_prefs, radius_km=0.5, top_k=5)
+    print(f"\nBest of {page['total_candidates']} spots within 500 m:")
+    for rec in page['results']:
+        print(f"Spot {rec['spot_id']}: Score {rec['score']:.4f} ({rec['distance'] * 1000:.0f} m)")
+    
+    # Repeated searches are served from the score cache until a spot changes
+    recommender.recommend((12.95, 77.60), user_prefs, radius_km=0.5, top_k=5)
+    recommender.update_spot(page['results'][0]['spot_id'], hourly_rate=14.0)
+    recommender.recommend((12.95, 77.60), user_prefs, radius_km=0.5, top_k=5)
+    print(f"\nScore cache: {recommender.get_cache_stats()}")
\ No newline at end of file
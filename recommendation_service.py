@@ -0,0 +1,285 @@
+"""
+ParkIn - Recommendation Scoring Service
+---------------------------------------
+This module coalesces concurrent recommendation requests into micro-batches.
+Requests submitted from many threads (one per user search) are queued and
+merged into a single feature matrix within a short time window, scored with
+one model.predict call on the shared ParkingRecommender and split back to
+each caller. Batching amortizes the high fixed cost of RandomForest
+prediction, which keeps tail latency flat when searches spike.
+"""
+
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from recommendation_engine import ParkingRecommender
+
+class RecommendationBatcher:
+    def __init__(self, recommender=None, max_batch_requests=64, max_batch_spots=20000,
+                 max_wait=0.005, latency_window=10000):
+        """
+        Initialize the scoring service
+        
+        Args:
+            recommender: Shared ParkingRecommender (a default one is created if None)
+            max_batch_requests: Maximum number of requests merged into one batch
+            max_batch_spots: Stop adding requests once a batch has this many spots
+            max_wait: Seconds to wait for more requests after the first one arrived
+            latency_window: Number of recent request latencies kept for percentiles
+        """
+        self.recommender = recommender if recommender is not None else ParkingRecommender()
+        self.max_batch_requests = max(1, int(max_batch_requests))
+        self.max_batch_spots = max_batch_spots
+        self.max_wait = max_wait
+        
+        self._queue = queue.Queue()
+        self._worker = None
+        # Guards _closed so no request is queued behind the stop sentinel
+        self._state_lock = threading.Lock()
+        self._closed = True
+        
+        self._latencies = deque(maxlen=latency_window)
+        self._batch_sizes = Counter()
+        self.stats = {
+            "requests": 0,
+            "batches": 0,
+            "spots_scored": 0
+        }
+    
+    def start(self):
+        """Start the batching worker thread"""
+        with self._state_lock:
+            if self._worker is not None:
+                return
+            self._closed = False
+            self._worker = threading.Thread(target=self._run, name="recommendation-batcher", daemon=True)
+            self._worker.start()
+    
+    def stop(self):
+        """Stop the worker after the queued requests have been served"""
+        with self._state_lock:
+            worker = self._worker
+            if worker is None or self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        
+        worker.join()
+        with self._state_lock:
+            self._worker = None
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+    
+    def submit(self, parking_spots, user_preferences, top_k=None):
+        """
+        Queue a scoring request
+        
+        Args:
+            parking_spots: List of parking spot dictionaries (as for
+                ParkingRecommender.predict_parking_score)
+            user_preferences: Dictionary with time_of_day and day_of_week
+            top_k: Number of best spots to return (None = all)
+        
+        Returns:
+            concurrent.futures.Future resolving to the ranked result list
+        """
+        future = Future()
+        with self._state_lock:
+            if self._closed:
+                raise RuntimeError("Batcher is not running, call start first")
+            self._queue.put((parking_spots, user_preferences, top_k, future, time.perf_counter()))
+        return future
+    
+    def predict_parking_score(self, parking_spots, user_preferences, top_k=None, timeout=None):
+        """Blocking version of submit, drop-in for ParkingRecommender.predict_parking_score"""
+        return self.submit(parking_spots, user_preferences, top_k).result(timeout)
+    
+    def _collect_batch(self):
+        """
+        Wait for requests and gather a batch
+        
+        Returns once max_batch_requests or max_batch_spots is reached or
+        max_wait elapsed after the first request arrived. Returns None when
+        the service is stopped and the queue is empty.
+        """
+        first = self._queue.get()
+        if first is None:
+            return None
+        
+        batch = [first]
+        spots = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_requests and spots < self.max_batch_spots:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Serve what we have, then stop on the next call
+                self._queue.put(None)
+                break
+            batch.append(request)
+            spots += len(request[0])
+        return batch
+    
+    def _score_batch(self, batch):
+        """Merge the requests of a batch into one feature matrix and score it"""
+        recommender = self.recommender
+        
+        spot_lists = [request[0] for request in batch]
+        all_spots = [spot for spots in spot_lists for spot in spots]
+        counts = [len(spots) for spots in spot_lists]
+        
+        spot_arrays = recommender.spots_to_columns(all_spots)
+        context = {
+            'time_of_day': np.repeat([request[1]['time_of_day'] for request in batch], counts),
+            'day_of_week': np.repeat([request[1]['day_of_week'] for request in batch], counts)
+        }
+        scores = recommender.score_spot_arrays(spot_arrays, context, [spot['id'] for spot in all_spots])
+        
+        # Split the scores back per request
+        results = []
+        offset = 0
+        for (spots, _, top_k, _, _), count in zip(batch, counts):
+            results.append(recommender.rank_spots(spots, scores[offset:offset + count], top_k))
+            offset += count
+        return results
+    
+    def _run(self):
+        """Worker thread: score queued requests in micro-batches"""
+        try:
+            self._serve()
+        finally:
+            # Never leave a caller waiting on a request that will not be served
+            with self._state_lock:
+                self._closed = True
+            while True:
+                try:
+                    request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is not None:
+                    request[3].set_exception(RuntimeError("Batcher stopped before serving the request"))
+    
+    def _serve(self):
+        """Score batches until the stop sentinel is reached"""
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                break
+            
+            try:
+                results = self._score_batch(batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][3].set_exception(e)
+                    continue
+                # Score the requests one by one so only the bad ones fail
+                results = []
+                for request in batch:
+                    try:
+                        results.append(self._score_batch([request])[0])
+                    except Exception as request_error:
+                        results.append(request_error)
+            
+            done = time.perf_counter()
+            self.stats["batches"] += 1
+            self._batch_sizes[len(batch)] += 1
+            for request, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    request[3].set_exception(result)
+                    continue
+                self.stats["requests"] += 1
+                self.stats["spots_scored"] += len(request[0])
+                self._latencies.append(done - request[4])
+                request[3].set_result(result)
+    
+    def get_stats(self):
+        """
+        Return service statistics
+        
+        Returns:
+            Dictionary with the request/batch counters, latency percentiles
+            (in milliseconds) over the recent requests and a histogram of the
+            number of requests per batch
+        """
+        stats = dict(self.stats)
+        latencies = np.array(self._latencies) * 1000
+        if len(latencies):
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+            stats["latency_ms"] = {
+                "p50": float(p50),
+                "p90": float(p90),
+                "p99": float(p99),
+                "max": float(latencies.max())
+            }
+        else:
+            stats["latency_ms"] = {}
+        stats["batch_size_histogram"] = dict(sorted(self._batch_sizes.items()))
+        stats["mean_batch_size"] = stats["requests"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+    
+    def reset_stats(self):
+        """Clear the counters, latencies and batch size histogram"""
+        self._latencies.clear()
+        self._batch_sizes.clear()
+        self.stats = {"requests": 0, "batches": 0, "spots_scored": 0}
+
+# Example usage
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+    from recommendation_engine import generate_sample_data
+    
+    X_data, y_data = generate_sample_data(1000)
+    recommender = ParkingRecommender(cache_size=0)
+    recommender.train(X_data, y_data)
+    
+    times = ['morning', 'afternoon', 'evening', 'night']
+    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    
+    def make_search(i):
+        rng = np.random.RandomState(i)
+        spots = [
+            {
+                'id': f'spot_{i}_{j}',
+                'distance_from_destination': rng.uniform(0.1, 5.0),
+                'hourly_rate': rng.uniform(1.0, 15.0),
+                'security_rating': rng.uniform(1.0, 5.0),
+                'is_covered': bool(rng.randint(2)),
+                'avg_occupancy': rng.uniform(0.1, 1.0),
+                'avg_rating': rng.uniform(1.0, 5.0)
+            }
+            for j in range(50)
+        ]
+        prefs = {'time_of_day': times[i % 4], 'day_of_week': days[i % 7]}
+        return spots, prefs
+    
+    searches = [make_search(i) for i in range(400)]
+    
+    # One predict call per search
+    start = time.perf_counter()
+    for spots, prefs in searches:
+        recommender.predict_parking_score(spots, prefs, top_k=5)
+    print(f"Sequential: {len(searches)} searches in {time.perf_counter() - start:.2f}s")
+    
+    # Concurrent searches coalesced into micro-batches
+    with RecommendationBatcher(recommender, max_wait=0.005) as batcher:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            list(executor.map(lambda s: batcher.predict_parking_score(s[0], s[1], top_k=5), searches))
+        print(f"Batched:    {len(searches)} searches in {time.perf_counter() - start:.2f}s")
+        
+        stats = batcher.get_stats()
+        print(f"Latency (ms): {stats['latency_ms']}")
+        print(f"Batch sizes:  {stats['batch_size_histogram']}")
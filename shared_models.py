@@ -0,0 +1,177 @@
+"""
+ParkIn - Shared Model Artifacts
+-------------------------------
+This module saves trained tree models as serving artifacts whose large
+array payloads can be memory-mapped read-only, so every worker process of
+a node maps the same physical pages instead of holding its own copy.
+
+Unpickled scikit-learn trees copy their nodes into private memory, so
+joblib's mmap_mode alone does not share them. Serving artifacts therefore
+store the ensembles as CompiledForest node arrays, which joblib writes
+uncompressed and maps back without copying.
+"""
+
+import os
+import resource
+
+import joblib
+import numpy as np
+
+from forest_inference import CompiledForest
+
+class CompiledPipeline:
+    def __init__(self, preprocessor, forest):
+        """
+        Serving version of a sklearn Pipeline ending in a tree ensemble
+        
+        Args:
+            preprocessor: Fitted transformer applied to the input features
+            forest: CompiledForest exported from the pipeline's regressor
+        """
+        self.preprocessor = preprocessor
+        self.forest = forest
+    
+    def predict(self, X):
+        """Transform the features and predict with the compiled forest"""
+        features = self.preprocessor.transform(X)
+        if hasattr(features, 'toarray'):
+            features = features.toarray()
+        return self.forest.predict(features)
+
+def compile_for_serving(model):
+    """
+    Convert a trained tree model into its memory-mappable serving form
+    
+    Args:
+        model: Fitted RandomForestRegressor, GradientBoostingRegressor,
+            HistGradientBoostingRegressor, a Pipeline ending in one of them,
+            or an already compiled model
+    
+    Returns:
+        CompiledForest or CompiledPipeline (histogram gradient boosting
+        models are returned unchanged)
+    """
+    if isinstance(model, (CompiledForest, CompiledPipeline)):
+        return model
+    final = model.steps[-1][1] if hasattr(model, 'steps') else model
+    if hasattr(final, '_predictors'):
+        # Histogram gradient boosting stores its trees as plain node arrays,
+        # which joblib memory-maps without copying
+        return model
+    if hasattr(model, 'steps'):
+        preprocessor = model[:-1] if len(model.steps) > 1 else None
+        forest = CompiledForest.from_sklearn(model.steps[-1][1])
+        return CompiledPipeline(preprocessor, forest) if preprocessor is not None else forest
+    return CompiledForest.from_sklearn(model)
+
+def save_artifact(artifact, path):
+    """
+    Save an artifact uncompressed, so its arrays can be memory-mapped
+    
+    The file is written to a temporary path and renamed into place, so
+    workers never map a partially written file.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = path + '.tmp'
+    joblib.dump(artifact, temp_path, compress=0)
+    os.replace(temp_path, path)
+
+def load_artifact(path, mmap=True):
+    """
+    Load an artifact saved with joblib
+    
+    Args:
+        path: Artifact file
+        mmap: Memory-map the arrays read-only (ignored for compressed files)
+    
+    Returns:
+        The loaded object
+    """
+    return joblib.load(path, mmap_mode='r' if mmap else None)
+
+def get_memory_usage():
+    """
+    Return the memory usage of the current process in MB
+    
+    Returns:
+        Dictionary with rss, pss (proportional set size: shared pages are
+        split between the processes mapping them, Linux only) and the peak rss
+    """
+    usage = {'rss_mb': None, 'pss_mb': None}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, value = line.split(':', 1)
+                if key in ('Rss', 'Pss'):
+                    usage[f"{key.lower()}_mb"] = int(value.split()[0]) / 1024
+    except (OSError, ValueError):
+        pass
+    
+    # ru_maxrss is reported in kilobytes on Linux
+    usage['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return usage
+
+def _report_worker_memory(path, mmap, sample, results, barrier):
+    """Worker process: load a model, predict and report memory before and after"""
+    before = get_memory_usage()
+    model = load_artifact(path, mmap)
+    if sample is not None:
+        model.predict(sample)
+    # Measure while every worker holds its model, so shared pages are split between them
+    barrier.wait()
+    after = get_memory_usage()
+    results.put({
+        'pid': os.getpid(),
+        'rss_before_mb': before['rss_mb'],
+        'rss_after_mb': after['rss_mb'],
+        'pss_after_mb': after['pss_mb']
+    })
+    barrier.wait()
+
+def measure_worker_memory(path, num_workers=4, mmap=True, sample=None):
+    """
+    Load an artifact in several worker processes and report their memory
+    
+    Args:
+        path: Artifact file
+        num_workers: Number of worker processes
+        mmap: Memory-map the arrays
+    
+    Returns:
+        List of per-worker memory reports (MB)
+    """
+    import multiprocessing
+    
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    barrier = context.Barrier(num_workers)
+    workers = [context.Process(target=_report_worker_memory, args=(path, mmap, sample, results, barrier))
+               for _ in range(num_workers)]
+    for worker in workers:
+        worker.start()
+    reports = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    return reports
+
+# Example usage
+if __name__ == "__main__":
+    from sklearn.ensemble import RandomForestRegressor
+    
+    np.random.seed(42)
+    X = np.random.rand(20000, 16)
+    y = X[:, 0] * 3 - X[:, 1] + np.random.normal(0, 0.1, len(X))
+    
+    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1).fit(X, y)
+    
+    os.makedirs("models", exist_ok=True)
+    save_artifact(model, "models/forest_sklearn.pkl")
+    save_artifact(compile_for_serving(model), "models/forest_shared.pkl")
+    
+    for label, path, mmap in (("sklearn model", "models/forest_sklearn.pkl", False),
+                              ("shared artifact", "models/forest_shared.pkl", True)):
+        reports = measure_worker_memory(path, num_workers=4, mmap=mmap, sample=X[:1000])
+        print(f"\n{label} ({os.path.getsize(path) / 1e6:.1f} MB on disk):")
+        for report in reports:
+            print(f"  worker {report['pid']}: RSS {report['rss_before_mb']:.0f} -> "
+                  f"{report['rss_after_mb']:.0f} MB, PSS {report['pss_after_mb']:.0f} MB")
@@ -0,0 +1,41 @@
+"""
+ParkIn - Chunked Table Reading
+------------------------------
+Reads training tables (feedback, transaction history) from disk in
+fixed-size chunks, so training code can stream data that does not fit in
+memory as one DataFrame.
+"""
+
+import os
+
+import pandas as pd
+
+def iter_table_chunks(path, chunksize=10000, columns=None):
+    """
+    Read a table from disk in chunks
+    
+    Args:
+        path: CSV (.csv), JSON lines (.jsonl/.ndjson) or Parquet (.parquet) file
+        chunksize: Number of rows per chunk
+        columns: Optional list of columns to read (CSV and Parquet only read these)
+    
+    Yields:
+        DataFrames of at most chunksize rows
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        reader = pd.read_csv(path, chunksize=chunksize, usecols=columns)
+    elif extension in ('.jsonl', '.ndjson'):
+        reader = pd.read_json(path, lines=True, chunksize=chunksize)
+    elif extension == '.parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet files requires pyarrow (pip install pyarrow)")
+        reader = (batch.to_pandas() for batch in
+                  pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns))
+    else:
+        raise ValueError(f"Unsupported table format: {path}")
+    
+    for chunk in reader:
+        yield chunk[columns] if columns is not None else chunk